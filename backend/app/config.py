@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -12,6 +13,33 @@ class Settings(BaseSettings):
     mcp_server_host: str = "localhost"
     mcp_server_port: int = 8001
     
+    database_url: Optional[str] = None
+    db_pool_min_size: int = 5
+    db_pool_max_size: int = 20
+    db_pool_max_idle: float = 300.0
+    
+    deep_research_concurrency: int = 5
+    chat_concurrency: int = 50
+    
+    cache_enabled: bool = True
+    cache_ttl_seconds: int = 86400
+    cache_max_entries: int = 1024
+    
+    semantic_cache_enabled: bool = False
+    semantic_cache_model: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_analysis_threshold: float = 0.92
+    semantic_cache_max_entries: int = 1000
+    
+    research_task_workers: int = 4
+    research_task_queue_size: int = 100
+    research_task_retention: int = 1000
+    
+    speculative_rewrite_enabled: bool = True
+    speculative_rewrite_max_pending: int = 128
+    
+    cors_origins: List[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
+    
     debug: bool = True
     log_level: str = "INFO"
     
@@ -19,7 +47,13 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings from the environment and .env once per process"""
+    return Settings()
+
+
+settings = get_settings()
 
 RESEARCH_DEPTH_CONFIG = {
     "fast": {
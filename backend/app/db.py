@@ -0,0 +1,32 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+from .config import settings
+
+
+async def open_pool() -> Optional[AsyncConnectionPool]:
+    """Open the shared PostgreSQL connection pool, if a database is configured"""
+    if not settings.database_url:
+        return None
+    
+    pool = AsyncConnectionPool(
+        conninfo=settings.database_url,
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_pool_max_size,
+        max_idle=settings.db_pool_max_idle,
+        open=False
+    )
+    await pool.open()
+    return pool
+
+
+async def get_db_connection(request: Request) -> AsyncIterator[AsyncConnection]:
+    """FastAPI dependency that borrows a connection from the shared pool"""
+    pool: Optional[AsyncConnectionPool] = getattr(request.app.state, "async_pool", None)
+    if pool is None:
+        raise HTTPException(status_code=503, detail="Database is not configured")
+    async with pool.connection() as conn:
+        yield conn
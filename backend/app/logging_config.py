@@ -0,0 +1,32 @@
+import logging
+import logging.config
+import queue
+from logging.handlers import QueueListener
+
+
+def configure_logging(level: str) -> QueueListener:
+    """Route the app's loggers through a queue drained by a background thread"""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "queue": {
+                "()": "logging.handlers.QueueHandler",
+                "queue": log_queue
+            }
+        },
+        "loggers": {
+            "app": {
+                "level": level.upper(),
+                "handlers": ["queue"],
+                "propagate": False
+            }
+        }
+    })
+    
+    return QueueListener(log_queue, stream_handler, respect_handler_level=True)
@@ -1,58 +1,133 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-import psycopg
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from contextlib import AsyncExitStack, asynccontextmanager
+import asyncio
+from typing import List, Dict, Any, Optional
+import hashlib
+import logging
+import openai
+import orjson
 
 from .models import (
     ResearchRequest, ResearchResult, ResearchMode,
     ClarificationResponse, PromptRewriteResponse,
     SearchResult, FetchResult, MCPSearchRequest, MCPFetchRequest,
-    WebSearchRequest, ClarificationWithAnswers
+    WebSearchRequest, ClarifyRequest, RewriteRequest, AnalysisRequest,
+    ResearchTask, ResearchBatchRequest, ResearchBatch, DEEP_RESEARCH_MODES
 )
+from .config import RESEARCH_DEPTH_CONFIG, settings
+from .db import open_pool
+from .logging_config import configure_logging
 from .services.research_service import ResearchService
 from .services.openai_service import OpenAIService
 from .services.websearch_service import WebSearchService
 from .services.mcp_service import MCPService
+from .services.http import close_shared_client
+from .services.task_queue import ResearchTaskQueue
+
+logger = logging.getLogger(__name__)
+_log_listener = configure_logging(settings.log_level)
+
+_RESEARCH_MODE_VALUES = tuple(mode.value for mode in ResearchMode)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize MCP server connection and database pool on startup and release them on shutdown"""
+    # Each cleanup is registered as soon as its resource exists and runs in reverse order,
+    # even when an earlier cleanup raises
+    async with AsyncExitStack() as stack:
+        _log_listener.start()
+        stack.callback(_log_listener.stop)
+        stack.push_async_callback(close_shared_client)
+        stack.push_async_callback(mcp_service.shutdown)
+        app.state.async_pool = await open_pool()
+        if app.state.async_pool is not None:
+            stack.push_async_callback(app.state.async_pool.close)
+        try:
+            await mcp_service.initialize_mcp_server()
+            logger.info("Deep Research API started successfully")
+            logger.info("Available research modes: %s", ", ".join(_RESEARCH_MODE_VALUES))
+        except Exception as e:
+            logger.warning("MCP server initialization failed: %s", e)
+            logger.warning("MCP functionality may be limited")
+        await _load_tools_payload()
+        stack.push_async_callback(openai_service.shutdown)
+        stack.push_async_callback(research_service.shutdown)
+        await research_task_queue.start()
+        stack.push_async_callback(research_task_queue.stop)
+        
+        yield
 
 app = FastAPI(
     title="Deep Research API",
     description="Comprehensive implementation of OpenAI Deep Research API capabilities with multiple research modes",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Disable CORS. Do not remove this for full-stack development.
+# Only the configured frontend origins may call the API; set CORS_ORIGINS for other deployments.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods
-    allow_headers=["*"],  # Allows all headers
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 research_service = ResearchService()
 openai_service = OpenAIService()
 websearch_service = WebSearchService()
 mcp_service = MCPService()
+research_task_queue = ResearchTaskQueue(
+    research_service,
+    workers=settings.research_task_workers,
+    maxsize=settings.research_task_queue_size,
+    retention=settings.research_task_retention
+)
+
+# Built once at startup; the tool definitions never change during the process lifetime.
+_TOOLS_BYTES: Optional[bytes] = None
+_TOOLS_ETAG: Optional[str] = None
+
+def _etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+def _static_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve a constant JSON body, answering 304 when the client already holds it"""
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+_HEALTHZ_BYTES = orjson.dumps({"status": "ok"})
 
 @app.get("/healthz")
 async def healthz():
-    return {"status": "ok"}
+    return Response(content=_HEALTHZ_BYTES, media_type="application/json")
+
+_ROOT_BYTES = orjson.dumps({
+    "message": "Deep Research API - OpenAI Implementation",
+    "version": "1.0.0",
+    "available_modes": _RESEARCH_MODE_VALUES,
+    "features": [
+        "Deep Research with o3-deep-research and o4-mini-deep-research models",
+        "3-step prompting workflow (clarification → prompt rewriting → deep research)",
+        "WebSearch + MCP combined research",
+        "WebSearch-only research",
+        "MCP-only research",
+        "Search and fetch tools for deep research models"
+    ]
+})
+_ROOT_ETAG = _etag_for(_ROOT_BYTES)
 
 @app.get("/")
-async def root():
-    return {
-        "message": "Deep Research API - OpenAI Implementation",
-        "version": "1.0.0",
-        "available_modes": [mode.value for mode in ResearchMode],
-        "features": [
-            "Deep Research with o3-deep-research and o4-mini-deep-research models",
-            "3-step prompting workflow (clarification → prompt rewriting → deep research)",
-            "WebSearch + MCP combined research",
-            "WebSearch-only research",
-            "MCP-only research",
-            "Search and fetch tools for deep research models"
-        ]
-    }
+async def root(request: Request):
+    return _static_json_response(request, _ROOT_BYTES, _ROOT_ETAG)
 
 @app.post("/research", response_model=ResearchResult)
 async def conduct_research(request: ResearchRequest):
@@ -75,27 +150,77 @@ async def conduct_research(request: ResearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
 
+@app.post("/research-tasks", response_model=ResearchTask, status_code=202)
+async def submit_research_task(request: ResearchRequest):
+    """
+    Queue a research request and return immediately with a task id to poll
+    """
+    try:
+        return research_task_queue.submit(request)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Research queue is full, try again later")
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/research-tasks/{task_id}", response_model=ResearchTask)
+async def get_research_task(task_id: str):
+    """
+    Get the status of a queued research request, including its result once finished
+    """
+    task = research_task_queue.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Research task not found")
+    return task
+
+@app.post("/research-batches", response_model=ResearchBatch, status_code=202)
+async def submit_research_batch(request: ResearchBatchRequest):
+    """
+    Submit non-interactive deep research prompts to the OpenAI Batch API and return the batch id to poll
+    """
+    if request.mode not in DEEP_RESEARCH_MODES:
+        raise HTTPException(status_code=400, detail="Batch research is only available for deep research modes")
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="At least one prompt is required")
+    max_tool_calls = _resolve_max_tool_calls(request.research_depth, request.max_tool_calls)
+    try:
+        return await openai_service.submit_deep_research_batch(request.prompts, request.mode, max_tool_calls)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch submission failed: {str(e)}")
+
+@app.get("/research-batches/{batch_id}", response_model=ResearchBatch)
+async def get_research_batch(batch_id: str):
+    """
+    Get the status of a deep research batch, including per-prompt outputs once it has completed
+    """
+    try:
+        return await openai_service.get_deep_research_batch(batch_id)
+    except openai.NotFoundError:
+        raise HTTPException(status_code=404, detail="Research batch not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch lookup failed: {str(e)}")
+
 @app.post("/clarify", response_model=ClarificationResponse)
-async def clarify_intent(request: dict):
+async def clarify_intent(request: ClarifyRequest):
     """
     Step 1 of the prompting workflow: Clarify user intent and generate follow-up questions
     """
     try:
-        query = request.get("query", "")
-        result = await openai_service.clarify_intent(query)
+        result = await openai_service.clarify_intent(request.query)
+        openai_service.start_speculative_rewrite(request.query, result)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Clarification failed: {str(e)}")
 
 @app.post("/rewrite-prompt", response_model=PromptRewriteResponse)
-async def rewrite_prompt(request: dict):
+async def rewrite_prompt(request: RewriteRequest):
     """
     Step 2 of the prompting workflow: Rewrite the prompt using clarification and user answers
     """
     try:
-        original_query = request.get("original_query", "")
-        clarification_with_answers = ClarificationWithAnswers(**request.get("clarification_with_answers", {}))
-        result = await openai_service.rewrite_prompt(original_query, clarification_with_answers)
+        speculative = openai_service.take_speculative_rewrite(request.original_query, request.clarification_with_answers)
+        if speculative is not None:
+            return await speculative
+        result = await openai_service.rewrite_prompt(request.original_query, request.clarification_with_answers)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prompt rewriting failed: {str(e)}")
@@ -133,107 +258,130 @@ async def mcp_fetch(request: MCPFetchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MCP fetch failed: {str(e)}")
 
+_RESEARCH_MODES_BYTES = orjson.dumps({
+    "modes": {
+        ResearchMode.DEEP_RESEARCH_O3.value: {
+            "name": "Pesquisa Profunda O3",
+            "description": "Usa o modelo o3-deep-research da OpenAI com ferramentas de busca e fetch",
+            "capabilities": ["busca_web", "busca_mcp", "fetch_mcp"],
+            "workflow": "Prompting de 3 etapas (clarificação → reescrita → pesquisa)"
+        },
+        ResearchMode.DEEP_RESEARCH_O4_MINI.value: {
+            "name": "Pesquisa Profunda O4 Mini", 
+            "description": "Usa o modelo o4-mini-deep-research da OpenAI com ferramentas de busca e fetch",
+            "capabilities": ["busca_web", "busca_mcp", "fetch_mcp"],
+            "workflow": "Prompting de 3 etapas (clarificação → reescrita → pesquisa)"
+        },
+        ResearchMode.WEBSEARCH_MCP.value: {
+            "name": "WebSearch + MCP Combinado",
+            "description": "Pesquisa combinada usando busca web e fontes internas MCP",
+            "capabilities": ["busca_web", "busca_mcp", "fetch_mcp", "síntese"],
+            "workflow": "Prompting de 3 etapas + análise de fontes combinadas"
+        },
+        ResearchMode.WEBSEARCH_ONLY.value: {
+            "name": "Apenas WebSearch",
+            "description": "Pesquisa usando apenas capacidades de busca web",
+            "capabilities": ["busca_web", "análise_web"],
+            "workflow": "Prompting de 3 etapas + pesquisa focada na web"
+        },
+        ResearchMode.MCP_ONLY.value: {
+            "name": "Apenas MCP",
+            "description": "Pesquisa usando apenas fontes internas MCP",
+            "capabilities": ["busca_mcp", "fetch_mcp", "análise_interna"],
+            "workflow": "Prompting de 3 etapas + análise de fontes internas"
+        }
+    }
+})
+_RESEARCH_MODES_ETAG = _etag_for(_RESEARCH_MODES_BYTES)
+
 @app.get("/research-modes")
-async def get_research_modes():
+async def get_research_modes(request: Request):
     """
     Get available research modes and their descriptions
     """
-    return {
-        "modes": {
-            ResearchMode.DEEP_RESEARCH_O3.value: {
-                "name": "Pesquisa Profunda O3",
-                "description": "Usa o modelo o3-deep-research da OpenAI com ferramentas de busca e fetch",
-                "capabilities": ["busca_web", "busca_mcp", "fetch_mcp"],
-                "workflow": "Prompting de 3 etapas (clarificação → reescrita → pesquisa)"
-            },
-            ResearchMode.DEEP_RESEARCH_O4_MINI.value: {
-                "name": "Pesquisa Profunda O4 Mini", 
-                "description": "Usa o modelo o4-mini-deep-research da OpenAI com ferramentas de busca e fetch",
-                "capabilities": ["busca_web", "busca_mcp", "fetch_mcp"],
-                "workflow": "Prompting de 3 etapas (clarificação → reescrita → pesquisa)"
-            },
-            ResearchMode.WEBSEARCH_MCP.value: {
-                "name": "WebSearch + MCP Combinado",
-                "description": "Pesquisa combinada usando busca web e fontes internas MCP",
-                "capabilities": ["busca_web", "busca_mcp", "fetch_mcp", "síntese"],
-                "workflow": "Prompting de 3 etapas + análise de fontes combinadas"
-            },
-            ResearchMode.WEBSEARCH_ONLY.value: {
-                "name": "Apenas WebSearch",
-                "description": "Pesquisa usando apenas capacidades de busca web",
-                "capabilities": ["busca_web", "análise_web"],
-                "workflow": "Prompting de 3 etapas + pesquisa focada na web"
-            },
-            ResearchMode.MCP_ONLY.value: {
-                "name": "Apenas MCP",
-                "description": "Pesquisa usando apenas fontes internas MCP",
-                "capabilities": ["busca_mcp", "fetch_mcp", "análise_interna"],
-                "workflow": "Prompting de 3 etapas + análise de fontes internas"
-            }
-        }
-    }
+    return _static_json_response(request, _RESEARCH_MODES_BYTES, _RESEARCH_MODES_ETAG)
+
+_DEPTH_OPTIONS_BYTES = orjson.dumps({
+    "depth_options": RESEARCH_DEPTH_CONFIG,
+    "default": "medium",
+    "description": "Opções de profundidade de pesquisa para controlar custo e velocidade"
+})
+_DEPTH_OPTIONS_ETAG = _etag_for(_DEPTH_OPTIONS_BYTES)
 
 @app.get("/research-depth-options")
-async def get_research_depth_options():
+async def get_research_depth_options(request: Request):
     """Get available research depth configurations"""
-    from .config import RESEARCH_DEPTH_CONFIG
-    return {
-        "depth_options": RESEARCH_DEPTH_CONFIG,
-        "default": "medium",
-        "description": "Opções de profundidade de pesquisa para controlar custo e velocidade"
-    }
+    return _static_json_response(request, _DEPTH_OPTIONS_BYTES, _DEPTH_OPTIONS_ETAG)
 
 @app.get("/tools")
-async def get_available_tools():
+async def get_available_tools(request: Request):
     """
     Get the tool definitions that deep research models can access
     """
-    try:
-        web_search_tool = await websearch_service.get_web_search_tool_definition()
-        mcp_search_tool = await mcp_service.get_mcp_search_tool_definition()
-        mcp_fetch_tool = await mcp_service.get_mcp_fetch_tool_definition()
-        
-        return {
-            "tools": [web_search_tool, mcp_search_tool, mcp_fetch_tool],
-            "note": "Deep research models (o3-deep-research, o4-mini-deep-research) only access search and fetch tools"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get tools: {str(e)}")
+    if _TOOLS_BYTES is None:
+        await _load_tools_payload()
+    return _static_json_response(request, _TOOLS_BYTES, _TOOLS_ETAG)
+
+def _resolve_max_tool_calls(research_depth: Optional[str], max_tool_calls: Optional[int]) -> Optional[int]:
+    if max_tool_calls is None and research_depth in RESEARCH_DEPTH_CONFIG:
+        return RESEARCH_DEPTH_CONFIG[research_depth]["max_tool_calls"]
+    return max_tool_calls
 
 @app.post("/research-analysis", response_model=ResearchResult)
-async def conduct_analysis_only(request: dict):
+async def conduct_analysis_only(request: AnalysisRequest):
     """
     Conduct analysis step only, after clarification and prompt rewriting are complete
     """
     try:
-        from .config import RESEARCH_DEPTH_CONFIG
-        
-        research_depth = request.get('research_depth', 'medium')
-        max_tool_calls = request.get('max_tool_calls')
-        if max_tool_calls is None and research_depth in RESEARCH_DEPTH_CONFIG:
-            max_tool_calls = RESEARCH_DEPTH_CONFIG[research_depth]["max_tool_calls"]
-        
         analysis_request = ResearchRequest(
-            query=request.get('rewritten_prompt', ''),
-            mode=ResearchMode(request.get('mode', 'o3-deep-research')),
+            query=request.rewritten_prompt,
+            mode=request.mode,
             include_clarification=False,
             include_prompt_rewriting=False,
-            research_depth=research_depth,
-            max_tool_calls=max_tool_calls,
-            background_mode=request.get('background_mode', True)
+            research_depth=request.research_depth,
+            max_tool_calls=_resolve_max_tool_calls(request.research_depth, request.max_tool_calls),
+            background_mode=request.background_mode
         )
         result = await research_service.conduct_research(analysis_request)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize MCP server connection on startup"""
-    try:
-        await mcp_service.initialize_mcp_server()
-        print("Deep Research API started successfully")
-        print("Available research modes:", [mode.value for mode in ResearchMode])
-    except Exception as e:
-        print(f"Warning: MCP server initialization failed: {e}")
-        print("MCP functionality may be limited")
+@app.post("/research/stream")
+async def stream_analysis(request: AnalysisRequest):
+    """
+    Stream the deep research analysis as server-sent events while the report is being generated
+    """
+    if request.mode not in DEEP_RESEARCH_MODES:
+        raise HTTPException(status_code=400, detail="Streaming is only available for deep research modes")
+    
+    async def events():
+        try:
+            async for delta in openai_service.stream_deep_research(
+                request.rewritten_prompt, request.mode, _resolve_max_tool_calls(request.research_depth, request.max_tool_calls)
+            ):
+                yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+        except Exception as e:
+            logger.exception("Deep research stream failed")
+            yield b"event: error\ndata: " + orjson.dumps({"detail": str(e)}) + b"\n\n"
+            return
+        yield b"event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+async def _build_tools_payload() -> Dict[str, Any]:
+    web_search_tool, mcp_search_tool, mcp_fetch_tool = await asyncio.gather(
+        websearch_service.get_web_search_tool_definition(),
+        mcp_service.get_mcp_search_tool_definition(),
+        mcp_service.get_mcp_fetch_tool_definition()
+    )
+    
+    return {
+        "tools": [web_search_tool, mcp_search_tool, mcp_fetch_tool],
+        "note": "Deep research models (o3-deep-research, o4-mini-deep-research) only access search and fetch tools"
+    }
+
+async def _load_tools_payload():
+    global _TOOLS_BYTES, _TOOLS_ETAG
+    _TOOLS_BYTES = orjson.dumps(await _build_tools_payload())
+    _TOOLS_ETAG = _etag_for(_TOOLS_BYTES)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import List, Optional, Dict, Any, Literal
 from enum import Enum
 
@@ -11,6 +11,10 @@ class ResearchMode(str, Enum):
     MCP_ONLY = "mcp-only"
 
 
+# Modes served by the Responses API deep research models rather than the search-then-analyse pipeline
+DEEP_RESEARCH_MODES = frozenset({ResearchMode.DEEP_RESEARCH_O3, ResearchMode.DEEP_RESEARCH_O4_MINI})
+
+
 class ResearchRequest(BaseModel):
     query: str
     mode: ResearchMode
@@ -31,6 +35,12 @@ class ClarificationQuestion(BaseModel):
 class ClarificationResponse(BaseModel):
     questions: List[ClarificationQuestion]
     clarified_intent: str
+    # Set on the canned response served when the model call fails; never serialized
+    _fallback: bool = PrivateAttr(default=False)
+    
+    @property
+    def is_fallback(self) -> bool:
+        return self._fallback
 
 
 class ClarificationAnswer(BaseModel):
@@ -44,10 +54,33 @@ class ClarificationWithAnswers(BaseModel):
     clarified_intent: str
 
 
+class ClarifyRequest(BaseModel):
+    query: str
+
+
+class RewriteRequest(BaseModel):
+    original_query: str
+    clarification_with_answers: ClarificationWithAnswers
+
+
+class AnalysisRequest(BaseModel):
+    rewritten_prompt: str
+    mode: ResearchMode = ResearchMode.DEEP_RESEARCH_O3
+    research_depth: Optional[Literal["fast", "medium", "deep"]] = "medium"
+    max_tool_calls: Optional[int] = None
+    background_mode: bool = True
+
+
 class PromptRewriteResponse(BaseModel):
     original_query: str
     rewritten_prompt: str
     reasoning: str
+    # Set on the canned prompt served when the model call fails; never serialized
+    _fallback: bool = PrivateAttr(default=False)
+    
+    @property
+    def is_fallback(self) -> bool:
+        return self._fallback
 
 
 class SearchResult(BaseModel):
@@ -84,6 +117,42 @@ class ResearchResult(BaseModel):
     total_duration_ms: int
     success: bool
     error_message: Optional[str] = None
+    # Served from the response cache; steps and durations describe the original run
+    cached: bool = False
+
+
+class ResearchTaskStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ResearchTask(BaseModel):
+    task_id: str
+    status: ResearchTaskStatus
+    created_at: str
+    result: Optional[ResearchResult] = None
+    error_message: Optional[str] = None
+
+
+class ResearchBatchRequest(BaseModel):
+    prompts: List[str]
+    mode: ResearchMode = ResearchMode.DEEP_RESEARCH_O3
+    research_depth: Optional[Literal["fast", "medium", "deep"]] = "medium"
+    max_tool_calls: Optional[int] = None
+
+
+class ResearchBatchItem(BaseModel):
+    custom_id: str
+    output: Optional[str] = None
+    error_message: Optional[str] = None
+
+
+class ResearchBatch(BaseModel):
+    batch_id: str
+    status: str
+    results: Optional[List[ResearchBatchItem]] = None
 
 
 class MCPSearchRequest(BaseModel):
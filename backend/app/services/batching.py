@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Iterable, List, Optional, Set, Tuple, TypeVar, Union
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RequestBatcher(Generic[T, R]):
+    """Coalesce concurrent calls into one batched call per short time window.
+    
+    Callers `submit` a single item and await its result; a background drainer
+    collects up to `max_batch` items arriving within `window_ms` of the first
+    one and hands them to `handler`, which must return one result per item in
+    the same order. An exception instance in place of a result fails only that
+    item's caller.
+    """
+    
+    def __init__(self, handler: Callable[[List[T]], Awaitable[List[Union[R, BaseException]]]],
+                 window_ms: float = 5, max_batch: int = 16):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue[Tuple[T, asyncio.Future]]] = None
+        self._drainer: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+    
+    async def submit(self, item: T) -> R:
+        queue = self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((item, future))
+        return await future
+    
+    async def stop(self):
+        """Cancel the drainer, let in-flight batches finish and fail anything not yet dispatched"""
+        if self._drainer is None:
+            return
+        self._drainer.cancel()
+        await asyncio.gather(self._drainer, *self._inflight, return_exceptions=True)
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, RuntimeError("Request batcher stopped"))
+        self._loop = None
+        self._queue = None
+        self._drainer = None
+    
+    def _ensure_running(self) -> asyncio.Queue:
+        # The drainer is started lazily and rebuilt if the event loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._drainer is None or self._drainer.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._drainer = loop.create_task(self._drain(self._queue))
+        return self._queue
+    
+    async def _drain(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            try:
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Items already taken off the queue would otherwise never be answered
+                self._fail(batch, RuntimeError("Request batcher stopped"))
+                raise
+            dispatch = loop.create_task(self._dispatch(batch))
+            self._inflight.add(dispatch)
+            dispatch.add_done_callback(self._inflight.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[T, asyncio.Future]]):
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            logger.exception("Batched request of %d items failed", len(batch))
+            self._fail(batch, e)
+            return
+        
+        if len(results) != len(batch):
+            logger.error("Batch handler returned %d results for %d items", len(results), len(batch))
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        self._fail(batch[len(results):], RuntimeError("Batch handler returned too few results"))
+    
+    @staticmethod
+    def _fail(entries: Iterable[Tuple[T, asyncio.Future]], error: BaseException):
+        for _, future in entries:
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,46 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Optional, Tuple, TypeVar
+
+
+V = TypeVar("V")
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable SHA-256 key for JSON-serializable request parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TTLCache(Generic[V]):
+    """Bounded in-process LRU cache whose entries expire after `ttl` seconds"""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, V]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: V):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,29 @@
+import logging
+from typing import Optional
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Process-wide HTTP/2 client shared by every service, created on first use"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            http2=True,
+            timeout=30.0
+        )
+    return _client
+
+
+async def close_shared_client():
+    """Close the shared client; the next get_shared_client() call builds a fresh one"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,125 +1,161 @@
-import asyncio
 import json
-from typing import List, Dict, Any, Optional
+import logging
+from typing import List, Dict, Any, Optional, Union
 import httpx
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
 from ..models import SearchResult, FetchResult, MCPSearchRequest, MCPFetchRequest
 from ..config import settings
+from .batching import RequestBatcher
+from .http import get_shared_client
 
 
+logger = logging.getLogger(__name__)
+
+
+# (index, id, url, relevance_score) for each mock search hit
+_MCP_SEARCH_TEMPLATES = [
+    (i, f"mcp_search_{i}", f"mcp://internal/document_{i}", 0.95 - (i * 0.05))
+    for i in range(1, 4)
+]
+
+_MCP_FETCH_CONTENT_PREFIX = """
+        
+        This is the full content retrieved from the MCP server for document """
+_MCP_FETCH_CONTENT_SUFFIX = """.
+        
+        - Document Type: Internal Research Document
+        - Last Updated: 2025-01-25
+        - Source: MCP Connected Database
+        
+        This document contains detailed information relevant to the research query.
+        The content has been processed and structured for analysis.
+        
+        [Detailed content would be here in a real implementation]
+        
+        - Internal Reference 1
+        - Internal Reference 2
+        """
+_MCP_FETCH_CONTENT_BASE_LENGTH = len(_MCP_FETCH_CONTENT_PREFIX) + len(_MCP_FETCH_CONTENT_SUFFIX)
+
+_MCP_FETCH_METADATA = {
+    "source": "mcp_server",
+    "document_type": "internal_research",
+    "last_updated": "2025-01-25"
+}
+
+_MCP_SEARCH_TOOL_DEF = {
+    "type": "function",
+    "function": {
+        "name": "mcp_search",
+        "description": "Search internal documents and data sources via MCP server",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "The search query to execute against internal sources"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of search results to return",
+                    "default": 10
+                }
+            },
+            "required": ["query"]
+        }
+    }
+}
+
+_MCP_FETCH_TOOL_DEF = {
+    "type": "function",
+    "function": {
+        "name": "mcp_fetch",
+        "description": "Fetch detailed content from internal sources via MCP server",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "id": {
+                    "type": "string",
+                    "description": "The ID of the document or resource to fetch"
+                }
+            },
+            "required": ["id"]
+        }
+    }
+}
+
 class MCPService:
     def __init__(self):
-        self.client = httpx.AsyncClient()
         self.mcp_session: Optional[ClientSession] = None
+        self._search_batcher: RequestBatcher[MCPSearchRequest, List[SearchResult]] = RequestBatcher(self._search_batch)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_shared_client()
+    
+    async def shutdown(self):
+        """Stop the background search batcher"""
+        await self._search_batcher.stop()
     
     async def initialize_mcp_server(self):
         """Initialize connection to MCP server"""
         try:
             pass
         except Exception as e:
-            print(f"Failed to initialize MCP server: {e}")
+            logger.exception("Failed to initialize MCP server: %s", e)
     
     async def search(self, request: MCPSearchRequest) -> List[SearchResult]:
         """Search using MCP server's search tool"""
-        
-        mock_results = [
-            SearchResult(
-                id=f"mcp_search_{i}",
+        # Built from trusted internal strings, so Pydantic validation is skipped
+        return [
+            SearchResult.model_construct(
+                id=result_id,
                 title=f"MCP Search Result {i}: {request.query}",
-                url=f"mcp://internal/document_{i}",
+                url=url,
                 snippet=f"Internal document content related to '{request.query}'. This represents data from an MCP-connected source.",
-                relevance_score=0.95 - (i * 0.05)
+                relevance_score=relevance_score
             )
-            for i in range(1, min(request.max_results + 1, 4))
+            for i, result_id, url, relevance_score in _MCP_SEARCH_TEMPLATES[:max(0, request.max_results or 0)]
         ]
-        
-        await asyncio.sleep(0.3)
-        return mock_results
+    
+    async def _search_batch(self, requests: List[MCPSearchRequest]) -> List[Union[List[SearchResult], Exception]]:
+        """Serve a batch of searches one search() at a time; a failing search only fails its own caller"""
+        results = []
+        for request in requests:
+            try:
+                results.append(await self.search(request))
+            except Exception as e:
+                results.append(e)
+        return results
     
     async def fetch(self, request: MCPFetchRequest) -> FetchResult:
         """Fetch detailed content using MCP server's fetch tool"""
+        mock_content = _MCP_FETCH_CONTENT_PREFIX + request.id + _MCP_FETCH_CONTENT_SUFFIX
         
-        mock_content = f"""
-        
-        This is the full content retrieved from the MCP server for document {request.id}.
-        
-        - Document Type: Internal Research Document
-        - Last Updated: 2025-01-25
-        - Source: MCP Connected Database
-        
-        This document contains detailed information relevant to the research query.
-        The content has been processed and structured for analysis.
-        
-        [Detailed content would be here in a real implementation]
-        
-        - Internal Reference 1
-        - Internal Reference 2
-        """
-        
-        await asyncio.sleep(0.2)
-        
-        return FetchResult(
+        # request.id was validated by MCPFetchRequest and the rest is internal mock data
+        return FetchResult.model_construct(
             id=request.id,
             content=mock_content,
             metadata={
-                "source": "mcp_server",
-                "document_type": "internal_research",
-                "last_updated": "2025-01-25",
-                "content_length": len(mock_content)
+                **_MCP_FETCH_METADATA,
+                "content_length": _MCP_FETCH_CONTENT_BASE_LENGTH + len(request.id)
             }
         )
     
     async def get_mcp_search_tool_definition(self) -> Dict[str, Any]:
         """Get the search tool definition for MCP that deep research models can use"""
-        return {
-            "type": "function",
-            "function": {
-                "name": "mcp_search",
-                "description": "Search internal documents and data sources via MCP server",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The search query to execute against internal sources"
-                        },
-                        "max_results": {
-                            "type": "integer",
-                            "description": "Maximum number of search results to return",
-                            "default": 10
-                        }
-                    },
-                    "required": ["query"]
-                }
-            }
-        }
+        return _MCP_SEARCH_TOOL_DEF
     
     async def get_mcp_fetch_tool_definition(self) -> Dict[str, Any]:
         """Get the fetch tool definition for MCP that deep research models can use"""
-        return {
-            "type": "function",
-            "function": {
-                "name": "mcp_fetch",
-                "description": "Fetch detailed content from internal sources via MCP server",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "id": {
-                            "type": "string",
-                            "description": "The ID of the document or resource to fetch"
-                        }
-                    },
-                    "required": ["id"]
-                }
-            }
-        }
+        return _MCP_FETCH_TOOL_DEF
     
     async def execute_mcp_search_tool(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Execute MCP search tool call for deep research models"""
         request = MCPSearchRequest(query=query, max_results=max_results)
-        results = await self.search(request)
+        results = await self._search_batcher.submit(request)
         
         return [
             {
@@ -142,3 +178,16 @@ class MCPService:
             "content": result.content,
             "metadata": result.metadata
         }
+    
+    async def fetch_documents(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch several documents one after another in a single awaitable, preserving the order of ids"""
+        results = [await self.fetch(MCPFetchRequest(id=id)) for id in ids]
+        
+        return [
+            {
+                "id": result.id,
+                "content": result.content,
+                "metadata": result.metadata
+            }
+            for result in results
+        ]
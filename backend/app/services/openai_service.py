@@ -1,100 +1,326 @@
 import openai
-from typing import List, Dict, Any, Optional
-import json
+import httpx
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, NamedTuple, Optional
+import msgspec
+import orjson
 import time
 from datetime import datetime
 import logging
+import textwrap
+from tenacity import AsyncRetrying, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from pydantic import ValidationError
 
 from ..config import settings
 from ..models import (
     ResearchRequest, ResearchResult, ClarificationResponse, 
     PromptRewriteResponse, ResearchStep, ResearchMode,
-    ClarificationWithAnswers
+    ClarificationWithAnswers, ResearchBatch, ResearchBatchItem, DEEP_RESEARCH_MODES
 )
+from .cache import TTLCache, make_cache_key
+from .semantic_cache import semantic_cache
+from .http import get_shared_client
 
 
 logger = logging.getLogger(__name__)
-if not logger.handlers:
-    level = getattr(logging, settings.log_level.upper(), logging.INFO)
-    logger.setLevel(level)
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+
+_DEEP_RESEARCH_MODELS = {
+    ResearchMode.DEEP_RESEARCH_O3: settings.deep_research_model_o3,
+    ResearchMode.DEEP_RESEARCH_O4_MINI: settings.deep_research_model_o4_mini
+}
+
+# Curated background baked into the clarification prefix so the model doesn't re-derive it per call
+_CAG_CLARIFY_CONTEXT = """Dimensões conhecidas a investigar:
+1) Setor: tecnologia, saúde, educação, finanças, agronegócio, indústria, serviços públicos
+2) Horizonte temporal: histórico (antes de 2020), atual (2023-2025), projeções (próximos 5-10 anos)
+3) Escopo geográfico: Brasil (nacional, regional ou estadual), América Latina ou comparação global
+4) Público-alvo: acadêmico, executivo/negócios, formulação de políticas públicas ou público geral
+5) Tipo de evidência: dados estatísticos, estudos acadêmicos, relatórios de mercado, notícias, legislação
+
+Fontes brasileiras comuns: IBGE (PNAD Contínua), IPEA, CAGED/RAIS (Ministério do Trabalho), Banco Central, FGV, BNDES, Senado/Câmara e Diário Oficial da União.
+Fontes internacionais comuns: OCDE, Banco Mundial, OIT, FMI, Fórum Econômico Mundial."""
+
+# Static instructions go in the system message so the prompt prefix stays identical across calls
+CLARIFY_SYSTEM = """Você é um assistente de pesquisa especializado. O usuário enviará uma consulta de pesquisa.
+
+""" + _CAG_CLARIFY_CONTEXT + """
+
+Sua tarefa é:
+1. Identificar ambiguidades ou contexto ausente na consulta
+2. Gerar 2-3 perguntas de clarificação que ajudariam a melhorar a pesquisa
+3. Fornecer uma declaração de intenção clarificada baseada em suposições razoáveis
+
+Foque em entender:
+- O escopo específico e profundidade da pesquisa necessária
+- Público-alvo ou caso de uso
+- Período de tempo ou restrições geográficas
+- Tipos preferidos de fontes ou evidências
+
+Responda em formato JSON com:
+{
+    "questions": [
+        {"question": "...", "context": "..."},
+        ...
+    ],
+    "clarified_intent": "Uma declaração clara do que o usuário provavelmente quer pesquisar"
+}"""
+
+REWRITE_SYSTEM = """Você é um especialista em engenharia de prompts para tarefas de pesquisa. Você precisa reescrever uma consulta do usuário em um prompt abrangente e detalhado adequado para pesquisa profunda.
+
+O usuário enviará a consulta original, a intenção clarificada e, opcionalmente, respostas a perguntas de clarificação.
+
+Crie um prompt detalhado e expandido que:
+1. Define claramente o escopo e objetivos da pesquisa baseado nas respostas do usuário
+2. Especifica o tipo de análise necessária incorporando as preferências do usuário
+3. Inclui orientações sobre tipos de fontes e qualidade de evidências conforme especificado pelo usuário
+4. Fornece estrutura para a saída esperada correspondendo aos requisitos do usuário
+5. Incorpora as melhores práticas para pesquisa abrangente
+
+O prompt reescrito deve ser adequado para um modelo de pesquisa profunda que irá:
+- Buscar informações relevantes usando ferramentas de busca web
+- Buscar conteúdo detalhado de fontes promissoras
+- Sintetizar descobertas em uma análise abrangente
+
+IMPORTANTE: O prompt reescrito deve ser em PORTUGUÊS BRASILEIRO e instruir o modelo a responder em português.
+
+Responda em formato JSON:
+{
+    "original_query": "A consulta original, exatamente como enviada",
+    "rewritten_prompt": "O prompt de pesquisa abrangente e detalhado incorporando as respostas do usuário, escrito em português brasileiro",
+    "reasoning": "Explicação de como as respostas do usuário melhoraram o prompt de pesquisa"
+}"""
+
+_MOCK_QUESTIONS = (
+    {
+        "question": "Qual é o foco específico da sua pesquisa sobre IA no mercado de trabalho?",
+        "context": "Você gostaria de focar em setores específicos (tecnologia, saúde, educação), tipos de trabalho (manual, intelectual, criativo), ou uma análise geral?"
+    },
+    {
+        "question": "Que período de tempo você gostaria que a análise cobrisse?",
+        "context": "Você está interessado em tendências atuais (2023-2025), projeções futuras (próximos 5-10 anos), ou uma perspectiva histórica comparativa?"
+    },
+    {
+        "question": "Você tem interesse em aspectos específicos do impacto da IA?",
+        "context": "Por exemplo: criação vs. eliminação de empregos, mudanças nas habilidades necessárias, impacto salarial, ou políticas públicas relacionadas?"
+    }
+)
+
+_CLARIFIED_INTENT = "Realizar pesquisa abrangente sobre como a inteligência artificial está transformando o mercado de trabalho no Brasil, incluindo análise de impactos atuais, tendências futuras e implicações socioeconômicas."
+
+# Built once; callers get a deep copy so neither the instance nor its questions are ever shared
+_FALLBACK_CLARIFY = ClarificationResponse(questions=list(_MOCK_QUESTIONS), clarified_intent=_CLARIFIED_INTENT)
+_FALLBACK_CLARIFY._fallback = True
+
+_REWRITE_TMPL = 'Consulta original: "{original_query}"\nIntenção clarificada: "{clarified_intent}"{answers}'
+_ANSWERS_HEADER = "\n\nUser provided the following answers to clarification questions:\n"
+_ANSWER_TMPL = "Q: {question}\nA: {answer}\n\n"
+
+DEEP_SYSTEM = textwrap.dedent("""
+        Você é um analista de pesquisa especializado. Sua tarefa é conduzir pesquisa minuciosa sobre o tópico dado usando as ferramentas disponíveis.
+        
+        Processo de Pesquisa:
+        1. Use a ferramenta de busca para encontrar fontes de informação relevantes
+        2. Use a ferramenta de busca para recuperar conteúdo detalhado das fontes mais promissoras
+        3. Analise e sintetize as informações para fornecer insights abrangentes
+        4. Cite suas fontes e forneça evidências para suas conclusões
+        
+        Diretrizes:
+        - Priorize fontes autoritativas e recentes
+        - Procure múltiplas perspectivas sobre tópicos controversos
+        - Forneça exemplos específicos e dados quando disponíveis
+        - Estruture sua resposta claramente com títulos e marcadores
+        - Inclua citações adequadas e referências de fontes
+        
+        IMPORTANTE: Responda sempre em PORTUGUÊS BRASILEIRO.
+""").strip()
+
+_DR_HEADERS = {
+    "Authorization": f"Bearer {settings.openai_api_key}",
+    "Content-Type": "application/json"
+}
+_DR_TOOLS = ({"type": "web_search_preview"},)
+
+# Exact-match cache of deep research output text, shared by every OpenAIService instance
+_response_cache: TTLCache[Any] = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+# Validated clarify/rewrite results as JSON and finished analyses, written only after the caller
+# has checked the completion so malformed or truncated output is never replayed
+_result_cache: TTLCache[str] = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Process-wide AsyncOpenAI client so every service shares one connection pool"""
+    return openai.AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        max_retries=0,
+        timeout=httpx.Timeout(60.0, connect=5.0)
+    )
+
+
+_DEBUG_BODY_PREVIEW = 2048
+
+# Process-wide caps on in-flight OpenAI calls so bursts queue here instead of thrashing on 429s
+_dr_semaphore = asyncio.Semaphore(settings.deep_research_concurrency)
+_chat_semaphore = asyncio.Semaphore(settings.chat_concurrency)
+
+_RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+_backoff = wait_exponential_jitter(initial=1, max=10)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Transient failures worth another attempt: rate limits, 5xx and connection problems"""
+    if isinstance(exc, openai.APITimeoutError):
+        # Same rule as below: a read timeout already burned the whole budget, so don't repeat it
+        return not isinstance(exc.__cause__, httpx.ReadTimeout)
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRYABLE_STATUS
+    # A read timeout on the Responses API means 30 minutes already elapsed; don't repeat that
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, httpx.ReadTimeout)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """Honour the server's Retry-After header when present, otherwise back off exponentially with jitter"""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after", "")), 30.0)
+        except ValueError:
+            pass
+    return _backoff(retry_state)
+
+
+_RETRY_POLICY = dict(
+    stop=stop_after_attempt(3),
+    wait=_wait_retry_after,
+    retry=retry_if_exception(_is_retryable),
+    reraise=True
+)
+_retry_transient = retry(**_RETRY_POLICY)
+
+
+class _OutputContent(msgspec.Struct):
+    type: str
+    text: str = ""
+
+
+class _OutputItem(msgspec.Struct):
+    type: str
+    content: List[_OutputContent] = []
+
+
+class _ResponsesEnvelope(msgspec.Struct):
+    """Only the parts of a Responses API body we read; everything else is skipped while decoding"""
+    status: Optional[str] = None
+    output: List[_OutputItem] = []
+
+
+_decode_responses_envelope = msgspec.json.Decoder(_ResponsesEnvelope).decode
+
+
+def _extract_output_text(envelope: _ResponsesEnvelope) -> str:
+    """Concatenate the output_text parts of a Responses API response"""
+    return "".join(
+        part.text
+        for item in envelope.output
+        if item.type == "message"
+        for part in item.content
+        if part.type == "output_text"
+    )
+
+
+# Deep research runs can take up to 30 minutes; every other call keeps the shared client's default
+_DR_TIMEOUT = httpx.Timeout(1800.0, connect=10.0)
+# A non-streaming analysis sends nothing until generation ends, so 60s would cap the whole answer
+_ANALYSIS_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+class DeepResearchTimeout(Exception):
+    """The Responses API did not answer within _DR_TIMEOUT; the message is meant for the user"""
+
+
+class Analysis(NamedTuple):
+    """Research output plus whether it is complete enough for callers to cache and replay"""
+    text: str
+    cacheable: bool
 
 
 class OpenAIService:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
+        self._speculative_rewrites: "OrderedDict[tuple, asyncio.Task]" = OrderedDict()
+    
+    async def shutdown(self):
+        """Cancel speculative rewrites nobody collected"""
+        for task in self._speculative_rewrites.values():
+            task.cancel()
+        self._speculative_rewrites.clear()
+    
+    def start_speculative_rewrite(self, query: str, clarification: ClarificationResponse):
+        """Run the no-answers rewrite in the background while the user reads the clarification questions"""
+        if not settings.speculative_rewrite_enabled:
+            return
+        key = (query, clarification.clarified_intent)
+        if key in self._speculative_rewrites:
+            return
+        self._speculative_rewrites[key] = asyncio.create_task(self.rewrite_prompt(
+            query,
+            ClarificationWithAnswers(questions=clarification.questions, answers=[], clarified_intent=clarification.clarified_intent)
+        ))
+        while len(self._speculative_rewrites) > settings.speculative_rewrite_max_pending:
+            _, stale = self._speculative_rewrites.popitem(last=False)
+            stale.cancel()
+    
+    def take_speculative_rewrite(self, original_query: str,
+                                 clarification_with_answers: ClarificationWithAnswers) -> Optional[asyncio.Task]:
+        """Hand over the prefetched rewrite if the user skipped the questions, cancelling it otherwise"""
+        task = self._speculative_rewrites.pop((original_query, clarification_with_answers.clarified_intent), None)
+        if task is not None and clarification_with_answers.answers:
+            task.cancel()
+            return None
+        return task
     
     async def clarify_intent(self, query: str) -> ClarificationResponse:
         """Step 1: Use intermediate model to clarify user intent"""
         start_time = time.time()
         
-        mock_questions = [
-            {
-                "question": "Qual é o foco específico da sua pesquisa sobre IA no mercado de trabalho?",
-                "context": "Você gostaria de focar em setores específicos (tecnologia, saúde, educação), tipos de trabalho (manual, intelectual, criativo), ou uma análise geral?"
-            },
-            {
-                "question": "Que período de tempo você gostaria que a análise cobrisse?",
-                "context": "Você está interessado em tendências atuais (2023-2025), projeções futuras (próximos 5-10 anos), ou uma perspectiva histórica comparativa?"
-            },
-            {
-                "question": "Você tem interesse em aspectos específicos do impacto da IA?",
-                "context": "Por exemplo: criação vs. eliminação de empregos, mudanças nas habilidades necessárias, impacto salarial, ou políticas públicas relacionadas?"
-            }
-        ]
-        
-        clarified_intent = f"Realizar pesquisa abrangente sobre como a inteligência artificial está transformando o mercado de trabalho no Brasil, incluindo análise de impactos atuais, tendências futuras e implicações socioeconômicas."
-        
         try:
             if settings.openai_api_key and settings.openai_api_key != "your_openai_api_key_here":
-                clarification_prompt = f"""
-                Você é um assistente de pesquisa especializado. Um usuário enviou a seguinte consulta de pesquisa:
-                
-                "{query}"
-                
-                Sua tarefa é:
-                1. Identificar ambiguidades ou contexto ausente na consulta
-                2. Gerar 2-3 perguntas de clarificação que ajudariam a melhorar a pesquisa
-                3. Fornecer uma declaração de intenção clarificada baseada em suposições razoáveis
+                cache_key = make_cache_key("clarify", query)
+                if settings.cache_enabled:
+                    cached = _result_cache.get(cache_key)
+                    if cached is not None:
+                        return ClarificationResponse.model_validate_json(cached)
                 
-                Foque em entender:
-                - O escopo específico e profundidade da pesquisa necessária
-                - Público-alvo ou caso de uso
-                - Período de tempo ou restrições geográficas
-                - Tipos preferidos de fontes ou evidências
-                
-                Responda em formato JSON com:
-                {{
-                    "questions": [
-                        {{"question": "...", "context": "..."}},
-                        ...
-                    ],
-                    "clarified_intent": "Uma declaração clara do que o usuário provavelmente quer pesquisar"
-                }}
-                """
+                cached = await semantic_cache.get("clarify", query)
+                if cached is not None:
+                    return ClarificationResponse.model_validate_json(cached)
                 
                 response = await self._make_openai_request(
                     model=settings.clarification_model,
-                    messages=[{"role": "user", "content": clarification_prompt}],
-                    response_format={"type": "json_object"}
+                    messages=[
+                        {"role": "system", "content": CLARIFY_SYSTEM},
+                        {"role": "user", "content": query}
+                    ],
+                    response_format={"type": "json_object"},
+                    extra_body={"prompt_cache_key": "clarify_v2_cag"}
                 )
                 
-                result_data = json.loads(response.choices[0].message.content)
-                return ClarificationResponse(**result_data)
+                result = ClarificationResponse.model_validate_json(response.choices[0].message.content)
+                result_json = result.model_dump_json()
+                if settings.cache_enabled:
+                    _result_cache.set(cache_key, result_json)
+                await semantic_cache.put("clarify", query, result_json)
+                return result
             else:
-                return ClarificationResponse(
-                    questions=mock_questions,
-                    clarified_intent=clarified_intent
-                )
+                return _FALLBACK_CLARIFY.model_copy(deep=True)
                 
-        except Exception as e:
-            return ClarificationResponse(
-                questions=mock_questions,
-                clarified_intent=clarified_intent
-            )
+        except (openai.APIError, httpx.HTTPError, ValidationError):
+            logger.exception("Clarification request failed, using fallback questions")
+            return _FALLBACK_CLARIFY.model_copy(deep=True)
     
     async def rewrite_prompt(self, original_query: str, clarification_with_answers: ClarificationWithAnswers) -> PromptRewriteResponse:
         """Step 2: Rewrite the prompt for deep research using user answers"""
@@ -102,201 +328,277 @@ class OpenAIService:
         
         user_answers_text = ""
         if clarification_with_answers.answers:
-            user_answers_text = "\n\nUser provided the following answers to clarification questions:\n"
-            for answer in clarification_with_answers.answers:
-                if answer.question_index < len(clarification_with_answers.questions):
-                    question = clarification_with_answers.questions[answer.question_index]
-                    user_answers_text += f"Q: {question.question}\nA: {answer.answer}\n\n"
-        
-        rewrite_prompt = f"""
-        Você é um especialista em engenharia de prompts para tarefas de pesquisa. Você precisa reescrever uma consulta do usuário em um prompt abrangente e detalhado adequado para pesquisa profunda.
-        
-        Consulta original: "{original_query}"
-        Intenção clarificada: "{clarification_with_answers.clarified_intent}"
-        {user_answers_text}
-        
-        Crie um prompt detalhado e expandido que:
-        1. Define claramente o escopo e objetivos da pesquisa baseado nas respostas do usuário
-        2. Especifica o tipo de análise necessária incorporando as preferências do usuário
-        3. Inclui orientações sobre tipos de fontes e qualidade de evidências conforme especificado pelo usuário
-        4. Fornece estrutura para a saída esperada correspondendo aos requisitos do usuário
-        5. Incorpora as melhores práticas para pesquisa abrangente
+            questions = clarification_with_answers.questions
+            user_answers_text = _ANSWERS_HEADER + "".join(
+                _ANSWER_TMPL.format(question=questions[answer.question_index].question, answer=answer.answer)
+                for answer in clarification_with_answers.answers
+                if answer.question_index < len(questions)
+            )
         
-        O prompt reescrito deve ser adequado para um modelo de pesquisa profunda que irá:
-        - Buscar informações relevantes usando ferramentas de busca web
-        - Buscar conteúdo detalhado de fontes promissoras
-        - Sintetizar descobertas em uma análise abrangente
+        rewrite_input = _REWRITE_TMPL.format(
+            original_query=original_query,
+            clarified_intent=clarification_with_answers.clarified_intent,
+            answers=user_answers_text
+        )
         
-        IMPORTANTE: O prompt reescrito deve ser em PORTUGUÊS BRASILEIRO e instruir o modelo a responder em português.
+        semantic_key = f"{original_query}\n{clarification_with_answers.clarified_intent}{user_answers_text}"
         
-        Responda em formato JSON:
-        {{
-            "original_query": "{original_query}",
-            "rewritten_prompt": "O prompt de pesquisa abrangente e detalhado incorporando as respostas do usuário, escrito em português brasileiro",
-            "reasoning": "Explicação de como as respostas do usuário melhoraram o prompt de pesquisa"
-        }}
-        """
+        cache_key = make_cache_key("rewrite", semantic_key)
         
         try:
+            if settings.cache_enabled:
+                cached = _result_cache.get(cache_key)
+                if cached is not None:
+                    return PromptRewriteResponse.model_validate_json(cached)
+            
+            cached = await semantic_cache.get("rewrite", semantic_key)
+            if cached is not None:
+                return PromptRewriteResponse.model_validate_json(cached).model_copy(update={"original_query": original_query})
+            
             response = await self._make_openai_request(
                 model=settings.prompt_rewriting_model,
-                messages=[{"role": "user", "content": rewrite_prompt}],
-                response_format={"type": "json_object"}
+                messages=[
+                    {"role": "system", "content": REWRITE_SYSTEM},
+                    {"role": "user", "content": rewrite_input}
+                ],
+                response_format={"type": "json_object"},
+                extra_body={"prompt_cache_key": "rewrite_v1"}
             )
             
-            result_data = json.loads(response.choices[0].message.content)
-            return PromptRewriteResponse(**result_data)
+            result = PromptRewriteResponse.model_validate_json(response.choices[0].message.content)
+            result_json = result.model_dump_json()
+            if settings.cache_enabled:
+                _result_cache.set(cache_key, result_json)
+            await semantic_cache.put("rewrite", semantic_key, result_json)
+            return result
             
-        except Exception as e:
-            return PromptRewriteResponse(
+        except (openai.APIError, httpx.HTTPError, ValidationError):
+            logger.exception("Prompt rewrite failed, using fallback prompt")
+            fallback = PromptRewriteResponse(
                 original_query=original_query,
                 rewritten_prompt=f"Conduza pesquisa abrangente sobre: {original_query}. Forneça análise detalhada com evidências de apoio de múltiplas fontes confiáveis. Responda em português brasileiro.",
                 reasoning="Reescrita de prompt de fallback devido a erro de processamento"
             )
+            fallback._fallback = True
+            return fallback
     
     async def deep_research(self, prompt: str, mode: ResearchMode, tools: List[Dict[str, Any]], 
                        research_depth: str = "medium", max_tool_calls: Optional[int] = None, 
-                       background_mode: bool = True) -> str:
+                       background_mode: bool = True, prompt_cache_key: str = "deep_v1",
+                       semantic_key: Optional[str] = None) -> Analysis:
         """Step 3: Perform deep research using specified model and tools with configurable depth"""
         logger.info("Starting deep research in mode %s with depth %s", mode.value, research_depth)
-        logger.debug("Research prompt: %s", prompt)
-        logger.debug("Tools: %s", tools)
-        logger.debug("Max tool calls: %s", max_tool_calls)
-        logger.debug("Background mode: %s", background_mode)
-        if mode == ResearchMode.DEEP_RESEARCH_O3:
-            model = settings.deep_research_model_o3
-        elif mode == ResearchMode.DEEP_RESEARCH_O4_MINI:
-            model = settings.deep_research_model_o4_mini
-        else:
-            model = "gpt-4"
-        
-        system_prompt = """
-        Você é um analista de pesquisa especializado. Sua tarefa é conduzir pesquisa minuciosa sobre o tópico dado usando as ferramentas disponíveis.
-        
-        Processo de Pesquisa:
-        1. Use a ferramenta de busca para encontrar fontes de informação relevantes
-        2. Use a ferramenta de busca para recuperar conteúdo detalhado das fontes mais promissoras
-        3. Analise e sintetize as informações para fornecer insights abrangentes
-        4. Cite suas fontes e forneça evidências para suas conclusões
-        
-        Diretrizes:
-        - Priorize fontes autoritativas e recentes
-        - Procure múltiplas perspectivas sobre tópicos controversos
-        - Forneça exemplos específicos e dados quando disponíveis
-        - Estruture sua resposta claramente com títulos e marcadores
-        - Inclua citações adequadas e referências de fontes
-        
-        IMPORTANTE: Responda sempre em PORTUGUÊS BRASILEIRO.
-        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Research prompt: %s", prompt)
+            logger.debug("Tools: %s", tools)
+            logger.debug("Max tool calls: %s", max_tool_calls)
+            logger.debug("Background mode: %s", background_mode)
+        model = _DEEP_RESEARCH_MODELS.get(mode, "gpt-4")
         
         try:
-            if mode in [ResearchMode.DEEP_RESEARCH_O3, ResearchMode.DEEP_RESEARCH_O4_MINI]:
-                response = await self._make_deep_research_request(
+            if mode in DEEP_RESEARCH_MODES:
+                return await self._make_deep_research_request(
                     model=model,
-                    prompt=f"{system_prompt}\n\nUser Query: {prompt}",
-                    tools=tools
+                    prompt=prompt,
+                    tools=tools,
+                    prompt_cache_key=prompt_cache_key
                 )
-                return response
             else:
+                cache_key = make_cache_key("analysis", model, prompt_cache_key, prompt)
+                if settings.cache_enabled:
+                    cached = _result_cache.get(cache_key)
+                    if cached is not None:
+                        return Analysis(cached, cacheable=True)
+                
+                # Match on the research prompt, not the assembled one: its fixed per-mode prefix would
+                # fill the embedding model's window and make unrelated topics look alike
+                semantic_namespace = f"analysis:{prompt_cache_key}"
+                if semantic_key is not None:
+                    cached = await semantic_cache.get(semantic_namespace, semantic_key, threshold=settings.semantic_cache_analysis_threshold)
+                    if cached is not None:
+                        return Analysis(cached, cacheable=True)
+                
                 response = await self._make_openai_request(
                     model=model,
                     messages=[
-                        {"role": "system", "content": system_prompt},
+                        {"role": "system", "content": DEEP_SYSTEM},
                         {"role": "user", "content": prompt}
                     ],
-                    tools=tools
+                    tools=tools,
+                    extra_body={"prompt_cache_key": prompt_cache_key},
+                    timeout=_ANALYSIS_TIMEOUT
                 )
-                return response.choices[0].message.content
+                choice = response.choices[0]
+                analysis = choice.message.content
+                # Truncated or tool-call completions are returned but never replayed
+                cacheable = choice.finish_reason == "stop" and bool(analysis)
+                if cacheable:
+                    if settings.cache_enabled:
+                        _result_cache.set(cache_key, analysis)
+                    if semantic_key is not None:
+                        await semantic_cache.put(semantic_namespace, semantic_key, analysis)
+                return Analysis(analysis or "", cacheable)
             
-        except Exception as e:
+        except (openai.APIError, httpx.HTTPError):
             logger.exception("Deep research failed")
-            return f"Error during deep research: {str(e)}"
+            raise
     
     async def _make_openai_request(self, **kwargs) -> Any:
-        """Make an OpenAI API request with error handling"""
-        try:
+        """Chat completion with transient-failure retries; callers cache the validated result themselves"""
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug("OpenAI request payload: %s", kwargs)
-            if "tools" in kwargs and kwargs["tools"]:
-                response = self.client.chat.completions.create(**kwargs)
+        async for attempt in AsyncRetrying(**_RETRY_POLICY):
+            with attempt:
+                async with _chat_semaphore:
+                    response = await self.client.chat.completions.create(**kwargs)
+        logger.debug("OpenAI response status: %s", getattr(response, "status_code", "n/a"))
+        return response
+    
+    @_retry_transient
+    async def _post_responses(self, payload: Dict[str, Any]) -> httpx.Response:
+        """Single Responses API call, retried on transient failures"""
+        client = get_shared_client()
+        async with _dr_semaphore:
+            response = await client.post(
+                "https://api.openai.com/v1/responses",
+                headers=_DR_HEADERS,
+                content=orjson.dumps(payload),
+                timeout=_DR_TIMEOUT
+            )
+        if response.status_code != 200:
+            logger.error("Deep research request failed with code %s: %s", response.status_code, response.text)
+            response.raise_for_status()
+        return response
+    
+    @staticmethod
+    def _build_deep_research_payload(model: str, prompt: str, max_tool_calls: Optional[int],
+                                     background_mode: bool, prompt_cache_key: str = "deep_v1") -> Dict[str, Any]:
+        """Responses API payload shared by the blocking and streaming deep research calls"""
+        payload = {
+            "model": model,
+            "instructions": DEEP_SYSTEM,
+            "input": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "input_text", "text": prompt}
+                    ]
+                }
+            ],
+            "reasoning": {"summary": "auto"},
+            "tools": _DR_TOOLS,
+            "background": background_mode,
+            "prompt_cache_key": prompt_cache_key
+        }
+        
+        if max_tool_calls is not None:
+            payload["max_tool_calls"] = max_tool_calls
+            logger.info("Configurando max_tool_calls para %d para controlar profundidade da pesquisa", max_tool_calls)
+        return payload
+    
+    async def stream_deep_research(self, prompt: str, mode: ResearchMode,
+                                   max_tool_calls: Optional[int] = None) -> AsyncIterator[str]:
+        """Yield deep research output text as the model generates it"""
+        model = _DEEP_RESEARCH_MODELS[mode]
+        payload = self._build_deep_research_payload(model, prompt, max_tool_calls, background_mode=False)
+        payload["stream"] = True
+        client = get_shared_client()
+        async with _dr_semaphore, client.stream("POST", "https://api.openai.com/v1/responses", headers=_DR_HEADERS,
+                                                content=orjson.dumps(payload), timeout=_DR_TIMEOUT) as response:
+            if response.status_code != 200:
+                await response.aread()
+                logger.error("Deep research stream failed with code %s: %s", response.status_code, response.text)
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: ") or line == "data: [DONE]":
+                    continue
+                event = orjson.loads(line[6:])
+                if event.get("type") == "response.output_text.delta":
+                    yield event["delta"]
+    
+    async def submit_deep_research_batch(self, prompts: List[str], mode: ResearchMode,
+                                         max_tool_calls: Optional[int] = None) -> ResearchBatch:
+        """Queue deep research prompts on the Batch API (half price, 24h window) and report the created batch"""
+        model = _DEEP_RESEARCH_MODELS[mode]
+        lines = [
+            orjson.dumps({
+                "custom_id": f"prompt-{index}",
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": self._build_deep_research_payload(model, prompt, max_tool_calls, background_mode=False)
+            })
+            for index, prompt in enumerate(prompts)
+        ]
+        client = self.client.with_options(max_retries=2)
+        batch_file = await client.files.create(
+            file=("deep_research_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/responses",
+            completion_window="24h"
+        )
+        logger.info("Deep research batch %s submitted with %d prompts", batch.id, len(prompts))
+        return ResearchBatch(batch_id=batch.id, status=batch.status)
+    
+    async def get_deep_research_batch(self, batch_id: str) -> ResearchBatch:
+        """Report a batch's status, downloading its outputs once it has completed"""
+        client = self.client.with_options(max_retries=2)
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            return ResearchBatch(batch_id=batch.id, status=batch.status)
+        
+        output = await client.files.content(batch.output_file_id)
+        results = []
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                item = ResearchBatchItem(custom_id=record["custom_id"], output=_extract_output_text(msgspec.convert(response["body"], _ResponsesEnvelope)))
             else:
-                response = self.client.chat.completions.create(**kwargs)
-            logger.debug("OpenAI response status: %s", getattr(response, "status_code", "n/a"))
-            return response
-        except Exception as e:
-            logger.exception("OpenAI API request failed")
-            raise Exception(f"OpenAI API error: {str(e)}")
+                error = record.get("error") or response.get("body", {}).get("error") or {}
+                item = ResearchBatchItem(custom_id=record["custom_id"], error_message=error.get("message", "Unknown error"))
+            results.append(item)
+        results.sort(key=lambda item: int(item.custom_id.rpartition("-")[2]))
+        return ResearchBatch(batch_id=batch.id, status=batch.status, results=results)
     
     async def _make_deep_research_request(self, model: str, prompt: str, tools: List[Dict[str, Any]], 
-                                         max_tool_calls: Optional[int] = None, background_mode: bool = True) -> str:
+                                         max_tool_calls: Optional[int] = None, background_mode: bool = True,
+                                         prompt_cache_key: str = "deep_v1") -> Analysis:
         """Make a request to the OpenAI Responses API for deep research models"""
         try:
-            import httpx
-            
-            headers = {
-                "Authorization": f"Bearer {settings.openai_api_key}",
-                "Content-Type": "application/json"
-            }
+            payload = self._build_deep_research_payload(model, prompt, max_tool_calls, background_mode, prompt_cache_key)
             
-            formatted_tools = [{"type": "web_search_preview"}]
+            cache_key = make_cache_key("responses", payload)
+            if settings.cache_enabled:
+                cached = _response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Deep research servida do cache")
+                    return Analysis(cached, cacheable=True)
             
-            payload = {
-                "model": model,
-                "input": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_text", "text": prompt}
-                        ]
-                    }
-                ],
-                "reasoning": {"summary": "auto"},
-                "tools": formatted_tools,
-                "background": background_mode
-            }
-            
-            if max_tool_calls is not None:
-                payload["max_tool_calls"] = max_tool_calls
-                logger.info("Configurando max_tool_calls para %d para controlar profundidade da pesquisa", max_tool_calls)
-            
-            logger.debug("Deep research payload: %s", payload)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Deep research payload: %s", payload)
             logger.info("Iniciando chamada para API de Deep Research - isso pode levar até 30 minutos...")
-            async with httpx.AsyncClient(timeout=httpx.Timeout(1800.0)) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/responses",
-                    headers=headers,
-                    json=payload
-                )
-            logger.info("Deep research API respondeu com status: %s", response.status_code)
-            if response.status_code == 200:
-                logger.info("Deep research concluída com sucesso!")
-            logger.debug("Deep research response body: %s", response.text)
-                
-            if response.status_code != 200:
-                error_detail = response.text
-                logger.error("Deep research request failed with code %s: %s", response.status_code, error_detail)
-                raise Exception(f"Error code: {response.status_code} - {error_detail}")
-
-            result = response.json()
-
-            if "choices" in result and len(result["choices"]) > 0:
-                choice = result["choices"][0]
-                if "message" in choice and "content" in choice["message"]:
-                    return choice["message"]["content"]
-                elif "content" in choice:
-                    return choice["content"]
-                else:
-                    return "No content returned"
-            else:
-                return "No response generated"
+            response = await self._post_responses(payload)
+            logger.info("Deep research concluída com sucesso! Status: %s", response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Deep research response body (first %d bytes): %r", _DEBUG_BODY_PREVIEW, response.content[:_DEBUG_BODY_PREVIEW])
+
+            envelope = _decode_responses_envelope(response.content)
+            content = _extract_output_text(envelope)
+            if not content:
+                logger.warning("Deep research returned no output text (status: %s)", envelope.status)
+                return Analysis("No response generated", cacheable=False)
+            if settings.cache_enabled:
+                _response_cache.set(cache_key, content)
+            return Analysis(content, cacheable=True)
                     
-        except httpx.ReadTimeout:
+        except httpx.ReadTimeout as e:
             logger.error("Deep research API timeout - a operação pode estar levando mais tempo que o esperado")
-            raise Exception("Deep research API timeout: A pesquisa está levando mais tempo que o esperado. Tente novamente ou use um prompt mais específico.")
-        except Exception as e:
-            logger.exception("Deep research API request failed")
-            error_msg = f"Deep research API error: {str(e)}"
-            if hasattr(e, 'response'):
-                response = getattr(e, 'response', None)
-                if response and hasattr(response, 'text'):
-                    error_msg += f" Response: {response.text}"
-            raise Exception(error_msg)
+            raise DeepResearchTimeout(
+                "Deep research API timeout: A pesquisa está levando mais tempo que o esperado. "
+                "Tente novamente ou use um prompt mais específico."
+            ) from e
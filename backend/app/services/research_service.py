@@ -1,119 +1,215 @@
 import time
+import heapq
 import asyncio
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from functools import cached_property, lru_cache
+from typing import Awaitable, List, Dict, Any, Optional, Tuple, TypeVar
 
+from ..config import settings
 from ..models import (
     ResearchRequest, ResearchResult, ResearchMode, ResearchStep,
     ClarificationResponse, ClarificationWithAnswers,
-    PromptRewriteResponse, SearchResult, FetchResult,
+    PromptRewriteResponse, SearchResult, FetchResult, DEEP_RESEARCH_MODES,
 )
-from .openai_service import OpenAIService
+from .cache import TTLCache, make_cache_key
+from .openai_service import Analysis, OpenAIService
 from .websearch_service import WebSearchService
 from .mcp_service import MCPService
 
+T = TypeVar("T")
+
+# Combined-mode results sent to the analysis prompt: snippets shorter than this carry
+# no usable evidence, and only the top-K by relevance are worth the input tokens
+_MIN_SNIPPET_CHARS = 40
+_ANALYSIS_TOP_K = 10
+
+# Static instructions lead each analysis prompt so OpenAI can reuse the cached prefix;
+# the query and the gathered sources always come after the separator.
+_COMBINED_ANALYSIS_PREFIX = (
+    "Forneça uma análise abrangente que sintetize as descobertas de fontes web e internas.\n"
+    "Responda em PORTUGUÊS BRASILEIRO.\n\n---\n\n"
+)
+_WEBSEARCH_ANALYSIS_PREFIX = (
+    "Forneça uma análise abrangente baseada nas descobertas da busca web.\n"
+    "Responda em PORTUGUÊS BRASILEIRO.\n\n---\n\n"
+)
+_MCP_ANALYSIS_PREFIX = (
+    "Forneça uma análise abrangente baseada nas fontes e dados internos.\n"
+    "Responda em PORTUGUÊS BRASILEIRO.\n\n---\n\n"
+)
+
+
+# Whole research results keyed on the full request, so repeats skip every downstream call
+_research_cache: TTLCache[str] = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+
+
+async def timed(awaitable: Awaitable[T]) -> Tuple[T, int]:
+    """Await and return the result together with the elapsed milliseconds"""
+    start = time.monotonic_ns()
+    result = await awaitable
+    return result, (time.monotonic_ns() - start) // 1_000_000
+
+
+class _PartialResearchError(Exception):
+    """A concurrent branch failed; carries what the branches that finished had gathered"""
+    
+    def __init__(self, message: str, search_results: List[SearchResult], fetch_results: List[FetchResult]):
+        super().__init__(message)
+        self.search_results = search_results
+        self.fetch_results = fetch_results
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+@lru_cache(maxsize=1024)
+def _fmt_ts(seconds: int) -> str:
+    """Format a step timestamp; steps of one request mostly land on the same few seconds"""
+    return datetime.fromtimestamp(seconds).isoformat()
+
 
 class ResearchService:
     def __init__(self):
-        self.openai_service = OpenAIService()
-        self.websearch_service = WebSearchService()
-        self.mcp_service = MCPService()
+        self._mode_handlers = {
+            ResearchMode.WEBSEARCH_MCP: self._conduct_combined_research,
+            ResearchMode.WEBSEARCH_ONLY: self._conduct_websearch_only_research,
+            ResearchMode.MCP_ONLY: self._conduct_mcp_only_research
+        }
+    
+    # Services are built on first use so a mode only pays for the clients it needs
+    @cached_property
+    def openai_service(self) -> OpenAIService:
+        return OpenAIService()
+    
+    @cached_property
+    def websearch_service(self) -> WebSearchService:
+        return WebSearchService()
+    
+    @cached_property
+    def mcp_service(self) -> MCPService:
+        return MCPService()
+    
+    async def shutdown(self):
+        """Stop background work owned by the services that were actually built"""
+        if "websearch_service" in self.__dict__:
+            await self.websearch_service.shutdown()
+        if "mcp_service" in self.__dict__:
+            await self.mcp_service.shutdown()
     
     async def conduct_research(self, request: ResearchRequest) -> ResearchResult:
         """Main research orchestration method"""
-        start_time = time.time()
+        cache_key = None
+        if settings.cache_enabled:
+            cache_key = make_cache_key("research", request.model_dump(mode="json"))
+            cached = _research_cache.get(cache_key)
+            if cached is not None:
+                return ResearchResult.model_validate_json(cached).model_copy(update={"cached": True})
+        
+        start_time = time.monotonic_ns()
         steps = []
         
         try:
             clarification = None
             if request.include_clarification:
-                clarification_start = time.time()
-                clarification = await self.openai_service.clarify_intent(request.query)
-                clarification_duration = int((time.time() - clarification_start) * 1000)
+                clarification, clarification_duration = await timed(self.openai_service.clarify_intent(request.query))
                 
-                steps.append(ResearchStep(
-                    step_type="clarification",
-                    input_data={"query": request.query},
-                    output_data=clarification.dict(),
-                    timestamp=datetime.now().isoformat(),
-                    duration_ms=clarification_duration
-                ))
+                self._record_step(
+                    steps, "clarification",
+                    {"query": request.query},
+                    clarification.model_dump(),
+                    clarification_duration
+                )
             
             prompt_rewrite = None
             research_prompt = request.query
             if request.include_prompt_rewriting:
-                rewrite_start = time.time()
                 clarification_with_answers = ClarificationWithAnswers(
                     questions=clarification.questions if clarification else [],
                     answers=[],
                     clarified_intent=clarification.clarified_intent if clarification else request.query,
                 )
-                prompt_rewrite = await self.openai_service.rewrite_prompt(
+                prompt_rewrite, rewrite_duration = await timed(self.openai_service.rewrite_prompt(
                     request.query,
                     clarification_with_answers,
-                )
+                ))
                 research_prompt = prompt_rewrite.rewritten_prompt
-                rewrite_duration = int((time.time() - rewrite_start) * 1000)
                 
-                steps.append(ResearchStep(
-                    step_type="prompt_rewriting",
-                    input_data={"original_query": request.query, "clarification": clarification.dict() if clarification else None},
-                    output_data=prompt_rewrite.dict(),
-                    timestamp=datetime.now().isoformat(),
-                    duration_ms=rewrite_duration
-                ))
+                self._record_step(
+                    steps, "prompt_rewriting",
+                    {"original_query": request.query, "clarification": clarification.model_dump() if clarification else None},
+                    prompt_rewrite.model_dump(),
+                    rewrite_duration
+                )
             
             search_results = []
             fetch_results = []
-            final_analysis = ""
+            analysis = Analysis("", cacheable=False)
             
-            if request.mode in [ResearchMode.DEEP_RESEARCH_O3, ResearchMode.DEEP_RESEARCH_O4_MINI]:
+            if request.mode in DEEP_RESEARCH_MODES:
                 tools = await self._get_tools_for_mode(request.mode)
-                research_start = time.time()
-                final_analysis = await self.openai_service.deep_research(
+                analysis, research_duration = await timed(self.openai_service.deep_research(
                     research_prompt, 
                     request.mode, 
                     tools,
                     research_depth=getattr(request, 'research_depth', 'medium'),
                     max_tool_calls=getattr(request, 'max_tool_calls', None),
                     background_mode=getattr(request, 'background_mode', True)
-                )
-                research_duration = int((time.time() - research_start) * 1000)
-                
-                steps.append(ResearchStep(
-                    step_type="analysis",
-                    input_data={"prompt": research_prompt, "mode": request.mode.value, "tools": [tool["function"]["name"] for tool in tools]},
-                    output_data={"analysis": final_analysis},
-                    timestamp=datetime.now().isoformat(),
-                    duration_ms=research_duration
                 ))
                 
-            elif request.mode == ResearchMode.WEBSEARCH_MCP:
-                search_results, fetch_results, final_analysis = await self._conduct_combined_research(research_prompt, steps)
-                
-            elif request.mode == ResearchMode.WEBSEARCH_ONLY:
-                search_results, fetch_results, final_analysis = await self._conduct_websearch_only_research(research_prompt, steps)
+                self._record_step(
+                    steps, "analysis",
+                    {"prompt": research_prompt, "mode": request.mode.value, "tools": [tool["function"]["name"] for tool in tools]},
+                    {"analysis": analysis.text},
+                    research_duration
+                )
                 
-            elif request.mode == ResearchMode.MCP_ONLY:
-                search_results, fetch_results, final_analysis = await self._conduct_mcp_only_research(research_prompt, steps)
+            else:
+                handler = self._mode_handlers.get(request.mode)
+                if handler is not None:
+                    search_results, fetch_results, analysis = await handler(research_prompt, steps)
             
-            total_duration = int((time.time() - start_time) * 1000)
+            total_duration = (time.monotonic_ns() - start_time) // 1_000_000
             
-            return ResearchResult(
+            result = ResearchResult(
                 query=request.query,
                 mode=request.mode,
                 clarification=clarification,
                 prompt_rewrite=prompt_rewrite,
                 search_results=search_results,
                 fetch_results=fetch_results,
-                final_analysis=final_analysis,
+                final_analysis=analysis.text,
                 steps=steps,
                 total_duration_ms=total_duration,
                 success=True
             )
+            # A run that fell back on canned clarify/rewrite output, or whose analysis was truncated
+            # or never produced, must not be replayed
+            degraded = not analysis.cacheable or (clarification is not None and clarification.is_fallback) or (
+                prompt_rewrite is not None and prompt_rewrite.is_fallback
+            )
+            if cache_key is not None and not degraded:
+                _research_cache.set(cache_key, result.model_dump_json())
+            return result
+            
+        except _PartialResearchError as e:
+            total_duration = (time.monotonic_ns() - start_time) // 1_000_000
+            return ResearchResult(
+                query=request.query,
+                mode=request.mode,
+                clarification=clarification,
+                prompt_rewrite=prompt_rewrite,
+                search_results=e.search_results,
+                fetch_results=e.fetch_results,
+                final_analysis="",
+                steps=steps,
+                total_duration_ms=total_duration,
+                success=False,
+                error_message=str(e)
+            )
             
         except Exception as e:
-            total_duration = int((time.time() - start_time) * 1000)
+            total_duration = (time.monotonic_ns() - start_time) // 1_000_000
             return ResearchResult(
                 query=request.query,
                 mode=request.mode,
@@ -125,211 +221,221 @@ class ResearchService:
                 steps=steps,
                 total_duration_ms=total_duration,
                 success=False,
-                error_message=str(e)
+                error_message=str(e) or type(e).__name__
             )
     
     async def _get_tools_for_mode(self, mode: ResearchMode) -> List[Dict[str, Any]]:
         """Get the appropriate tools for the research mode"""
-        tools = []
-        
-        if mode in [ResearchMode.DEEP_RESEARCH_O3, ResearchMode.DEEP_RESEARCH_O4_MINI]:
-            if mode in [ResearchMode.DEEP_RESEARCH_O3, ResearchMode.DEEP_RESEARCH_O4_MINI]:
-                tools.append(await self.websearch_service.get_web_search_tool_definition())
-                tools.append(await self.mcp_service.get_mcp_search_tool_definition())
-                tools.append(await self.mcp_service.get_mcp_fetch_tool_definition())
-        
-        return tools
+        if mode not in DEEP_RESEARCH_MODES:
+            return []
+        return [
+            await self.websearch_service.get_web_search_tool_definition(),
+            await self.mcp_service.get_mcp_search_tool_definition(),
+            await self.mcp_service.get_mcp_fetch_tool_definition()
+        ]
     
-    async def _conduct_combined_research(self, prompt: str, steps: List[ResearchStep]) -> tuple[List[SearchResult], List[FetchResult], str]:
+    async def _conduct_combined_research(self, prompt: str, steps: List[ResearchStep]) -> tuple[List[SearchResult], List[FetchResult], Analysis]:
         """Conduct research using both WebSearch and MCP"""
         search_results = []
         fetch_results = []
         
-        web_search_start = time.time()
-        web_results = await self.websearch_service.execute_web_search_tool(prompt, max_results=5)
-        web_search_duration = int((time.time() - web_search_start) * 1000)
-        
-        search_results.extend([SearchResult(**result) for result in web_results])
-        
-        steps.append(ResearchStep(
-            step_type="search",
-            input_data={"query": prompt, "source": "websearch"},
-            output_data={"results_count": len(web_results)},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=web_search_duration
-        ))
-        
-        mcp_search_start = time.time()
-        mcp_results = await self.mcp_service.execute_mcp_search_tool(prompt, max_results=3)
-        mcp_search_duration = int((time.time() - mcp_search_start) * 1000)
-        
-        search_results.extend([SearchResult(**result) for result in mcp_results])
-        
-        steps.append(ResearchStep(
-            step_type="search",
-            input_data={"query": prompt, "source": "mcp"},
-            output_data={"results_count": len(mcp_results)},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=mcp_search_duration
-        ))
+        # The MCP search -> fetch pipeline runs alongside the web search instead of after it;
+        # the task group cancels the other branch as soon as one fails, keeping it only if it had finished
+        error_message = None
+        try:
+            async with asyncio.TaskGroup() as tg:
+                web_task = tg.create_task(timed(self.websearch_service.execute_web_search_tool(prompt, max_results=5)))
+                mcp_task = tg.create_task(self._search_and_fetch_mcp(prompt, max_results=3))
+        except* Exception as eg:
+            error_message = "; ".join(str(e) for e in eg.exceptions)
+        
+        if _succeeded(web_task):
+            web_results, web_search_duration = web_task.result()
+            search_results += [SearchResult.model_construct(**result) for result in web_results]
+            
+            self._record_step(
+                steps, "search",
+                {"query": prompt, "source": "websearch"},
+                {"results_count": len(web_results)},
+                web_search_duration
+            )
         
-        for result in search_results[:3]:
-            if result.url.startswith("mcp://"):
-                fetch_start = time.time()
-                fetch_result = await self.mcp_service.execute_mcp_fetch_tool(result.id)
-                fetch_duration = int((time.time() - fetch_start) * 1000)
-                
-                fetch_results.append(FetchResult(**fetch_result))
+        if _succeeded(mcp_task):
+            mcp_results, mcp_search_duration, fetched = mcp_task.result()
+            search_results += [SearchResult.model_construct(**result) for result in mcp_results]
+            
+            self._record_step(
+                steps, "search",
+                {"query": prompt, "source": "mcp"},
+                {"results_count": len(mcp_results)},
+                mcp_search_duration
+            )
+            
+            for fetch_result, fetch_duration in fetched:
+                fetch_results.append(FetchResult.model_construct(**fetch_result))
                 
-                steps.append(ResearchStep(
-                    step_type="fetch",
-                    input_data={"id": result.id, "source": "mcp"},
-                    output_data={"content_length": len(fetch_result["content"])},
-                    timestamp=datetime.now().isoformat(),
-                    duration_ms=fetch_duration
-                ))
-        
-        analysis_prompt = f"""
-        Baseado na pesquisa conduzida sobre: {prompt}
-        
-        Resultados de Busca Encontrados:
-        {self._format_search_results_for_analysis(search_results)}
-        
-        Conteúdo Detalhado Recuperado:
-        {self._format_fetch_results_for_analysis(fetch_results)}
+                self._record_step(
+                    steps, "fetch",
+                    {"id": fetch_result["id"], "source": "mcp"},
+                    {"content_length": len(fetch_result["content"])},
+                    fetch_duration
+                )
         
-        Forneça uma análise abrangente que sintetize as descobertas de fontes web e internas.
-        Responda em PORTUGUÊS BRASILEIRO.
-        """
+        search_results = self._dedupe_search_results(search_results)
+        if error_message is not None:
+            raise _PartialResearchError(error_message, search_results, fetch_results)
         
-        analysis_start = time.time()
-        final_analysis = await self.openai_service.deep_research(analysis_prompt, ResearchMode.WEBSEARCH_MCP, [])
-        analysis_duration = int((time.time() - analysis_start) * 1000)
+        analysis_prompt = _COMBINED_ANALYSIS_PREFIX + (
+            f"Pesquisa conduzida sobre: {prompt}\n\n"
+            f"Resultados de Busca Encontrados:\n{self._format_search_results_for_analysis(self._select_for_analysis(search_results))}\n\n"
+            f"Conteúdo Detalhado Recuperado:\n{self._format_fetch_results_for_analysis(fetch_results)}"
+        )
         
-        steps.append(ResearchStep(
-            step_type="analysis",
-            input_data={"prompt": analysis_prompt},
-            output_data={"analysis": final_analysis},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=analysis_duration
+        analysis, analysis_duration = await timed(self.openai_service.deep_research(
+            analysis_prompt, ResearchMode.WEBSEARCH_MCP, [], prompt_cache_key="analysis_combined_v1", semantic_key=prompt
         ))
         
-        return search_results, fetch_results, final_analysis
+        self._record_step(
+            steps, "analysis",
+            {"prompt": analysis_prompt},
+            {"analysis": analysis.text},
+            analysis_duration
+        )
+        
+        return search_results, fetch_results, analysis
     
-    async def _conduct_websearch_only_research(self, prompt: str, steps: List[ResearchStep]) -> tuple[List[SearchResult], List[FetchResult], str]:
+    async def _conduct_websearch_only_research(self, prompt: str, steps: List[ResearchStep]) -> tuple[List[SearchResult], List[FetchResult], Analysis]:
         """Conduct research using only WebSearch"""
-        search_results = []
         fetch_results = []
         
-        web_search_start = time.time()
-        web_results = await self.websearch_service.execute_web_search_tool(prompt, max_results=8)
-        web_search_duration = int((time.time() - web_search_start) * 1000)
-        
-        search_results.extend([SearchResult(**result) for result in web_results])
-        
-        steps.append(ResearchStep(
-            step_type="search",
-            input_data={"query": prompt, "source": "websearch_only"},
-            output_data={"results_count": len(web_results)},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=web_search_duration
-        ))
-        
-        analysis_prompt = f"""
-        Baseado nos resultados de busca web para: {prompt}
+        web_results, web_search_duration = await timed(self.websearch_service.execute_web_search_tool(prompt, max_results=8))
         
-        Resultados de Busca:
-        {self._format_search_results_for_analysis(search_results)}
+        search_results = [SearchResult.model_construct(**result) for result in web_results]
         
-        Forneça uma análise abrangente baseada nas descobertas da busca web.
-        Responda em PORTUGUÊS BRASILEIRO.
-        """
+        self._record_step(
+            steps, "search",
+            {"query": prompt, "source": "websearch_only"},
+            {"results_count": len(web_results)},
+            web_search_duration
+        )
         
-        analysis_start = time.time()
-        final_analysis = await self.openai_service.deep_research(analysis_prompt, ResearchMode.WEBSEARCH_ONLY, [])
-        analysis_duration = int((time.time() - analysis_start) * 1000)
+        analysis_prompt = _WEBSEARCH_ANALYSIS_PREFIX + (
+            f"Busca web para: {prompt}\n\n"
+            f"Resultados de Busca:\n{self._format_search_results_for_analysis(search_results)}"
+        )
         
-        steps.append(ResearchStep(
-            step_type="analysis",
-            input_data={"prompt": analysis_prompt},
-            output_data={"analysis": final_analysis},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=analysis_duration
+        analysis, analysis_duration = await timed(self.openai_service.deep_research(
+            analysis_prompt, ResearchMode.WEBSEARCH_ONLY, [], prompt_cache_key="analysis_websearch_v1", semantic_key=prompt
         ))
         
-        return search_results, fetch_results, final_analysis
+        self._record_step(
+            steps, "analysis",
+            {"prompt": analysis_prompt},
+            {"analysis": analysis.text},
+            analysis_duration
+        )
+        
+        return search_results, fetch_results, analysis
     
-    async def _conduct_mcp_only_research(self, prompt: str, steps: List[ResearchStep]) -> tuple[List[SearchResult], List[FetchResult], str]:
+    async def _conduct_mcp_only_research(self, prompt: str, steps: List[ResearchStep]) -> tuple[List[SearchResult], List[FetchResult], Analysis]:
         """Conduct research using only MCP"""
-        search_results = []
         fetch_results = []
         
-        mcp_search_start = time.time()
-        mcp_results = await self.mcp_service.execute_mcp_search_tool(prompt, max_results=6)
-        mcp_search_duration = int((time.time() - mcp_search_start) * 1000)
+        mcp_results, mcp_search_duration, fetched = await self._search_and_fetch_mcp(prompt, max_results=6)
         
-        search_results.extend([SearchResult(**result) for result in mcp_results])
+        search_results = [SearchResult.model_construct(**result) for result in mcp_results]
         
-        steps.append(ResearchStep(
-            step_type="search",
-            input_data={"query": prompt, "source": "mcp_only"},
-            output_data={"results_count": len(mcp_results)},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=mcp_search_duration
-        ))
+        self._record_step(
+            steps, "search",
+            {"query": prompt, "source": "mcp_only"},
+            {"results_count": len(mcp_results)},
+            mcp_search_duration
+        )
         
-        for result in search_results:
-            fetch_start = time.time()
-            fetch_result = await self.mcp_service.execute_mcp_fetch_tool(result.id)
-            fetch_duration = int((time.time() - fetch_start) * 1000)
+        for fetch_result, fetch_duration in fetched:
+            fetch_results.append(FetchResult.model_construct(**fetch_result))
             
-            fetch_results.append(FetchResult(**fetch_result))
-            
-            steps.append(ResearchStep(
-                step_type="fetch",
-                input_data={"id": result.id, "source": "mcp_only"},
-                output_data={"content_length": len(fetch_result["content"])},
-                timestamp=datetime.now().isoformat(),
-                duration_ms=fetch_duration
-            ))
-        
-        analysis_prompt = f"""
-        Baseado na pesquisa interna para: {prompt}
-        
-        Fontes Internas Encontradas:
-        {self._format_search_results_for_analysis(search_results)}
+            self._record_step(
+                steps, "fetch",
+                {"id": fetch_result["id"], "source": "mcp_only"},
+                {"content_length": len(fetch_result["content"])},
+                fetch_duration
+            )
         
-        Conteúdo Interno Detalhado:
-        {self._format_fetch_results_for_analysis(fetch_results)}
+        analysis_prompt = _MCP_ANALYSIS_PREFIX + (
+            f"Pesquisa interna para: {prompt}\n\n"
+            f"Fontes Internas Encontradas:\n{self._format_search_results_for_analysis(search_results)}\n\n"
+            f"Conteúdo Interno Detalhado:\n{self._format_fetch_results_for_analysis(fetch_results)}"
+        )
         
-        Forneça uma análise abrangente baseada nas fontes e dados internos.
-        Responda em PORTUGUÊS BRASILEIRO.
-        """
+        analysis, analysis_duration = await timed(self.openai_service.deep_research(
+            analysis_prompt, ResearchMode.MCP_ONLY, [], prompt_cache_key="analysis_mcp_v1", semantic_key=prompt
+        ))
         
-        analysis_start = time.time()
-        final_analysis = await self.openai_service.deep_research(analysis_prompt, ResearchMode.MCP_ONLY, [])
-        analysis_duration = int((time.time() - analysis_start) * 1000)
+        self._record_step(
+            steps, "analysis",
+            {"prompt": analysis_prompt},
+            {"analysis": analysis.text},
+            analysis_duration
+        )
         
+        return search_results, fetch_results, analysis
+    
+    async def _search_and_fetch_mcp(self, prompt: str, max_results: int
+                                    ) -> Tuple[List[Dict[str, Any]], int, List[Tuple[Dict[str, Any], int]]]:
+        """Search MCP and fetch every hit as soon as the search returns"""
+        mcp_results, search_duration = await timed(self.mcp_service.execute_mcp_search_tool(prompt, max_results=max_results))
+        fetched = await self._fetch_mcp_documents([result["id"] for result in mcp_results])
+        return mcp_results, search_duration, fetched
+    
+    async def _fetch_mcp_documents(self, ids: List[str]) -> List[Tuple[Dict[str, Any], int]]:
+        """Fetch MCP documents with one service call, splitting its latency evenly across the documents"""
+        if not ids:
+            return []
+        documents, duration = await timed(self.mcp_service.fetch_documents(ids))
+        per_document = duration // len(ids)
+        return [(document, per_document) for document in documents]
+    
+    @staticmethod
+    def _dedupe_search_results(results: List[SearchResult]) -> List[SearchResult]:
+        """Drop results whose URL (or id, when there is no URL) was already seen, keeping the first"""
+        seen = set()
+        deduped = []
+        for result in results:
+            key = result.url or result.id
+            if key in seen:
+                continue
+            seen.add(key)
+            deduped.append(result)
+        return deduped
+    
+    @staticmethod
+    def _select_for_analysis(results: List[SearchResult]) -> List[SearchResult]:
+        """Keep the most relevant results with a usable snippet"""
+        usable = [result for result in results if len(result.snippet) >= _MIN_SNIPPET_CHARS]
+        return heapq.nlargest(_ANALYSIS_TOP_K, usable, key=lambda result: result.relevance_score or 0)
+    
+    @staticmethod
+    def _record_step(steps: List[ResearchStep], step_type: str, input_data: Dict[str, Any],
+                     output_data: Dict[str, Any], duration_ms: int):
         steps.append(ResearchStep(
-            step_type="analysis",
-            input_data={"prompt": analysis_prompt},
-            output_data={"analysis": final_analysis},
-            timestamp=datetime.now().isoformat(),
-            duration_ms=analysis_duration
+            step_type=step_type,
+            input_data=input_data,
+            output_data=output_data,
+            timestamp=_fmt_ts(time.time_ns() // 1_000_000_000),
+            duration_ms=duration_ms
         ))
-        
-        return search_results, fetch_results, final_analysis
     
     def _format_search_results_for_analysis(self, results: List[SearchResult]) -> str:
         """Format search results for analysis prompt"""
-        formatted = []
-        for i, result in enumerate(results, 1):
-            formatted.append(f"{i}. {result.title}\n   URL: {result.url}\n   Snippet: {result.snippet}")
-        return "\n\n".join(formatted)
+        return "\n\n".join(
+            f"{i}. {result.title}\n   URL: {result.url}\n   Snippet: {result.snippet}"
+            for i, result in enumerate(results, 1)
+        )
     
     def _format_fetch_results_for_analysis(self, results: List[FetchResult]) -> str:
         """Format fetch results for analysis prompt"""
-        formatted = []
-        for i, result in enumerate(results, 1):
-            formatted.append(f"Document {i} (ID: {result.id}):\n{result.content[:500]}...")
-        return "\n\n".join(formatted)
+        return "\n\n".join(
+            f"Document {i} (ID: {result.id}):\n{result.content[:500]}..."
+            for i, result in enumerate(results, 1)
+        )
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ..config import settings
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Collection:
+    """Normalized embeddings with their cached values, oldest first"""
+    
+    def __init__(self):
+        self.vectors = None
+        self.values: List[str] = []
+        self.expires_at: List[float] = []
+
+
+class SemanticCache:
+    """Cache that returns a stored value when a new text is close enough in embedding space.
+    
+    Requires the optional `sentence-transformers` dependency; without it, or when
+    SEMANTIC_CACHE_ENABLED is false, every lookup is a miss and writes are dropped.
+    Each namespace is a separate collection so different kinds of responses never match.
+    """
+    
+    def __init__(self, model_name: str, threshold: float, ttl: float, max_entries: int, enabled: bool):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled and SentenceTransformer is not None
+        self._model: Optional["SentenceTransformer"] = None
+        self._model_lock = threading.Lock()
+        self._collections: Dict[str, _Collection] = {}
+        
+        if enabled and SentenceTransformer is None:
+            logger.warning("Semantic cache disabled: sentence-transformers is not installed")
+    
+    async def get(self, namespace: str, text: str, threshold: Optional[float] = None) -> Optional[str]:
+        """Return the value stored for the most similar text, if it clears the threshold"""
+        collection = self._collections.get(namespace)
+        if not self.enabled or collection is None or not collection.values:
+            return None
+        
+        embedding = await asyncio.to_thread(self._encode, text)
+        self._purge_expired(collection)
+        if not collection.values:
+            return None
+        
+        scores = collection.vectors @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < (self.threshold if threshold is None else threshold):
+            return None
+        logger.debug("Semantic cache hit in %s (score %.3f)", namespace, scores[best])
+        return collection.values[best]
+    
+    async def put(self, namespace: str, text: str, value: str):
+        if not self.enabled:
+            return
+        
+        embedding = await asyncio.to_thread(self._encode, text)
+        collection = self._collections.setdefault(namespace, _Collection())
+        self._purge_expired(collection)
+        
+        row = embedding[np.newaxis, :]
+        collection.vectors = row if collection.vectors is None else np.vstack([collection.vectors, row])
+        collection.values.append(value)
+        collection.expires_at.append(time.monotonic() + self.ttl)
+        
+        excess = len(collection.values) - self.max_entries
+        if excess > 0:
+            self._drop_oldest(collection, excess)
+    
+    def _encode(self, text: str):
+        with self._model_lock:
+            if self._model is None:
+                self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(text, normalize_embeddings=True)
+    
+    def _purge_expired(self, collection: _Collection):
+        now = time.monotonic()
+        expired = 0
+        while expired < len(collection.expires_at) and collection.expires_at[expired] <= now:
+            expired += 1
+        if expired:
+            self._drop_oldest(collection, expired)
+    
+    @staticmethod
+    def _drop_oldest(collection: _Collection, count: int):
+        collection.vectors = collection.vectors[count:]
+        del collection.values[:count]
+        del collection.expires_at[:count]
+
+
+semantic_cache = SemanticCache(
+    model_name=settings.semantic_cache_model,
+    threshold=settings.semantic_cache_threshold,
+    ttl=settings.cache_ttl_seconds,
+    max_entries=settings.semantic_cache_max_entries,
+    enabled=settings.semantic_cache_enabled
+)
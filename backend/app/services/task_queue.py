@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..models import ResearchRequest, ResearchTask, ResearchTaskStatus
+from .research_service import ResearchService
+
+
+logger = logging.getLogger(__name__)
+
+_FINISHED_STATUSES = (ResearchTaskStatus.COMPLETED, ResearchTaskStatus.FAILED)
+
+
+class ResearchTaskQueue:
+    """Bounded in-process queue that runs research requests on a fixed pool of workers"""
+    
+    def __init__(self, research_service: ResearchService, workers: int, maxsize: int, retention: int):
+        self.research_service = research_service
+        self.workers = workers
+        self.maxsize = maxsize
+        self.retention = retention
+        self.tasks: Dict[str, ResearchTask] = {}
+        self._queue: Optional[asyncio.Queue[Tuple[str, ResearchRequest]]] = None
+        self._worker_tasks: List[asyncio.Task] = []
+    
+    async def start(self):
+        """Create the queue and spawn the worker tasks on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        """Cancel the workers; queued tasks that never started are marked as failed"""
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+        
+        for task in self.tasks.values():
+            if task.status not in _FINISHED_STATUSES:
+                task.status = ResearchTaskStatus.FAILED
+                task.error_message = "Server shut down before the research finished"
+    
+    def submit(self, request: ResearchRequest) -> ResearchTask:
+        """Enqueue a research request; raises asyncio.QueueFull when the queue is at capacity"""
+        if self._queue is None:
+            raise RuntimeError("Research task queue is not running")
+        
+        task = ResearchTask(
+            task_id=uuid.uuid4().hex,
+            status=ResearchTaskStatus.QUEUED,
+            created_at=datetime.now().isoformat()
+        )
+        self._queue.put_nowait((task.task_id, request))
+        self.tasks[task.task_id] = task
+        self._evict_finished()
+        return task
+    
+    def get(self, task_id: str) -> Optional[ResearchTask]:
+        return self.tasks.get(task_id)
+    
+    def _evict_finished(self):
+        """Forget the oldest finished tasks once more than `retention` are tracked"""
+        excess = len(self.tasks) - self.retention
+        if excess <= 0:
+            return
+        for task_id in [task_id for task_id, task in self.tasks.items() if task.status in _FINISHED_STATUSES][:excess]:
+            del self.tasks[task_id]
+    
+    async def _worker(self):
+        while True:
+            task_id, request = await self._queue.get()
+            task = self.tasks[task_id]
+            task.status = ResearchTaskStatus.RUNNING
+            try:
+                result = await self.research_service.conduct_research(request)
+                task.result = result
+                task.status = ResearchTaskStatus.COMPLETED if result.success else ResearchTaskStatus.FAILED
+                task.error_message = result.error_message
+            except Exception as e:
+                logger.exception("Research task %s failed", task_id)
+                task.status = ResearchTaskStatus.FAILED
+                task.error_message = str(e)
+            finally:
+                self._queue.task_done()
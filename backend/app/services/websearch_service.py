@@ -4,17 +4,58 @@ import json
 import asyncio
 
 from ..models import SearchResult, WebSearchRequest
+from .batching import RequestBatcher
+from .http import get_shared_client
+
+
+_WEB_SEARCH_TOOL_DEF = {
+    "type": "function",
+    "function": {
+        "name": "web_search",
+        "description": "Search the web for information on a given query",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "The search query to execute"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of search results to return",
+                    "default": 10
+                }
+            },
+            "required": ["query"]
+        }
+    }
+}
 
 
 class WebSearchService:
     def __init__(self):
-        self.client = httpx.AsyncClient()
+        self._search_batcher: RequestBatcher[WebSearchRequest, List[SearchResult]] = RequestBatcher(self._search_batch)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_shared_client()
+    
+    async def shutdown(self):
+        """Stop the background search batcher"""
+        await self._search_batcher.stop()
     
     async def search(self, request: WebSearchRequest) -> List[SearchResult]:
         """Perform web search using OpenAI's web search capabilities"""
-        
-        
-        mock_results = [
+        await asyncio.sleep(0.5)
+        return self._build_results(request)
+    
+    async def _search_batch(self, requests: List[WebSearchRequest]) -> List[List[SearchResult]]:
+        """Serve a batch of searches with a single round trip"""
+        await asyncio.sleep(0.5)
+        return [self._build_results(request) for request in requests]
+    
+    def _build_results(self, request: WebSearchRequest) -> List[SearchResult]:
+        return [
             SearchResult(
                 id=f"search_result_{i}",
                 title=f"Search Result {i} for: {request.query}",
@@ -24,40 +65,15 @@ class WebSearchService:
             )
             for i in range(1, min(request.max_results + 1, 6))
         ]
-        
-        await asyncio.sleep(0.5)
-        
-        return mock_results
     
     async def get_web_search_tool_definition(self) -> Dict[str, Any]:
         """Get the tool definition for web search that deep research models can use"""
-        return {
-            "type": "function",
-            "function": {
-                "name": "web_search",
-                "description": "Search the web for information on a given query",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The search query to execute"
-                        },
-                        "max_results": {
-                            "type": "integer",
-                            "description": "Maximum number of search results to return",
-                            "default": 10
-                        }
-                    },
-                    "required": ["query"]
-                }
-            }
-        }
+        return _WEB_SEARCH_TOOL_DEF
     
     async def execute_web_search_tool(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Execute web search tool call for deep research models"""
         request = WebSearchRequest(query=query, max_results=max_results)
-        results = await self.search(request)
+        results = await self._search_batcher.submit(request)
         
         return [
             {
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.services.batching import RequestBatcher
+
+
+def test_concurrent_submissions_share_one_batch():
+    calls = []
+
+    async def handler(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = RequestBatcher(handler, window_ms=20, max_batch=16)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_batches_are_capped_at_max_batch():
+    calls = []
+
+    async def handler(items):
+        calls.append(len(items))
+        return items
+
+    async def scenario():
+        batcher = RequestBatcher(handler, window_ms=20, max_batch=2)
+        await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+
+    asyncio.run(scenario())
+    assert calls == [2, 2, 1]
+
+
+def test_failures_and_missing_results_only_fail_their_own_items():
+    async def handler(items):
+        return [ValueError("boom") if item == 1 else item for item in items[:-1]]
+
+    async def scenario():
+        batcher = RequestBatcher(handler, window_ms=20, max_batch=16)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    first, second, third = asyncio.run(scenario())
+    assert first == 0
+    assert isinstance(second, ValueError)
+    assert isinstance(third, RuntimeError)
+
+
+def test_stop_fails_items_the_drainer_already_collected():
+    async def handler(items):
+        return items
+
+    async def scenario():
+        batcher = RequestBatcher(handler, window_ms=1000, max_batch=16)
+        pending = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(pending, return_exceptions=True), 1)
+
+    [result] = asyncio.run(scenario())
+    assert isinstance(result, RuntimeError)
@@ -0,0 +1,115 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.models import ResearchMode
+from app.services import cache as cache_module
+from app.services.cache import TTLCache, make_cache_key
+from app.services import openai_service as openai_module
+from app.services.openai_service import OpenAIService
+
+
+def test_cache_key_ignores_dict_ordering():
+    assert make_cache_key("chat", {"model": "m", "messages": []}) == make_cache_key("chat", {"messages": [], "model": "m"})
+    assert make_cache_key("chat", {"model": "m"}) != make_cache_key("chat", {"model": "n"})
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=10, ttl=5)
+
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+
+    now[0] += 5
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_clarify_result_is_reused_for_identical_queries(monkeypatch):
+    monkeypatch.setattr(openai_module, "_result_cache", TTLCache(max_entries=10, ttl=60))
+    calls = []
+
+    async def make_openai_request(**kwargs):
+        calls.append(kwargs)
+        content = '{"questions": [{"question": "Q?", "context": "C"}], "clarified_intent": "intent"}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    service = OpenAIService()
+    service._make_openai_request = make_openai_request
+
+    first = asyncio.run(service.clarify_intent("same query"))
+    second = asyncio.run(service.clarify_intent("same query"))
+
+    assert len(calls) == 1
+    assert second == first
+
+
+def test_malformed_completion_is_not_replayed(monkeypatch):
+    monkeypatch.setattr(openai_module, "_result_cache", TTLCache(max_entries=10, ttl=60))
+    contents = ["not json", '{"questions": [], "clarified_intent": "intent"}']
+
+    class _Completions:
+        async def create(self, **kwargs):
+            content = contents.pop(0)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")])
+
+    service = OpenAIService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=_Completions()))
+
+    first = asyncio.run(service.clarify_intent("same query"))
+    second = asyncio.run(service.clarify_intent("same query"))
+
+    assert first.is_fallback
+    assert not contents
+    assert second.clarified_intent == "intent"
+
+
+def test_analysis_semantic_cache_matches_on_the_research_prompt(monkeypatch):
+    monkeypatch.setattr(openai_module, "_result_cache", TTLCache(max_entries=10, ttl=60))
+    lookups = []
+
+    async def get(namespace, text, threshold=None):
+        lookups.append((namespace, text))
+        return "análise em cache"
+
+    monkeypatch.setattr(openai_module.semantic_cache, "get", get)
+
+    service = OpenAIService()
+    result = asyncio.run(service.deep_research(
+        "Prefixo fixo\n\n---\n\nPesquisa: IA", ResearchMode.WEBSEARCH_ONLY, [],
+        prompt_cache_key="analysis_websearch_v1", semantic_key="IA"
+    ))
+
+    assert result == ("análise em cache", True)
+    assert lookups == [("analysis:analysis_websearch_v1", "IA")]
+
+
+def test_fallback_clarification_is_not_shared(monkeypatch):
+    monkeypatch.setattr(openai_module.settings, "openai_api_key", "")
+
+    service = OpenAIService()
+    first = asyncio.run(service.clarify_intent("a"))
+    first.questions[0].question = "alterada"
+    first.questions.clear()
+
+    second = asyncio.run(service.clarify_intent("b"))
+    assert second.questions[0].question != "alterada"
+    assert second.is_fallback
@@ -1,10 +1,13 @@
 import sys
 from pathlib import Path
+
+import pytest
 from fastapi.testclient import TestClient
 
 # Ensure the backend 'app' package is importable
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from app import main as main_module
 from app.main import app
 
 client = TestClient(app)
@@ -14,3 +17,21 @@ def test_healthz():
     response = client.get("/healthz")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_shutdown_runs_every_cleanup_when_one_fails(monkeypatch):
+    closed = []
+
+    async def failing_stop():
+        raise RuntimeError("queue stuck")
+
+    async def close_shared_client():
+        closed.append("http")
+
+    monkeypatch.setattr(main_module.research_task_queue, "stop", failing_stop)
+    monkeypatch.setattr(main_module, "close_shared_client", close_shared_client)
+
+    with pytest.raises(RuntimeError, match="queue stuck"):
+        with TestClient(app):
+            pass
+    assert closed == ["http"]
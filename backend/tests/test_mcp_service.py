@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.models import MCPSearchRequest, MCPFetchRequest
+from app.services.mcp_service import MCPService
+
+
+def run_without_suspending(coro):
+    """Drive a coroutine one step; it must finish without yielding to the event loop"""
+    with pytest.raises(StopIteration) as exc_info:
+        coro.send(None)
+    return exc_info.value.value
+
+
+def test_search_returns_without_awaiting():
+    service = MCPService()
+    results = run_without_suspending(service.search(MCPSearchRequest(query="ia", max_results=2)))
+
+    assert [result.id for result in results] == ["mcp_search_1", "mcp_search_2"]
+    assert results[0].title == "MCP Search Result 1: ia"
+
+
+@pytest.mark.parametrize("max_results", [-1, 0, None])
+def test_search_returns_nothing_for_non_positive_limits(max_results):
+    service = MCPService()
+    assert run_without_suspending(service.search(MCPSearchRequest(query="ia", max_results=max_results))) == []
+
+
+def test_fetch_returns_without_awaiting():
+    service = MCPService()
+    result = run_without_suspending(service.fetch(MCPFetchRequest(id="doc_1")))
+
+    assert result.id == "doc_1"
+    assert "document doc_1." in result.content
+    assert result.metadata["content_length"] == len(result.content)
+
+
+def test_batch_fetch_preserves_id_order():
+    service = MCPService()
+    documents = run_without_suspending(service.fetch_documents(["doc_2", "doc_1"]))
+
+    assert [document["id"] for document in documents] == ["doc_2", "doc_1"]
+    assert all(document["metadata"]["source"] == "mcp_server" for document in documents)
@@ -0,0 +1,52 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import openai
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.services import openai_service as openai_module
+from app.services.openai_service import OpenAIService, _is_retryable
+
+
+def _rate_limit_error() -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": "0"}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_transient_errors_are_retryable():
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    assert _is_retryable(_rate_limit_error())
+    assert _is_retryable(httpx.ConnectError("boom", request=request))
+    assert not _is_retryable(httpx.ReadTimeout("slow", request=request))
+    try:
+        raise openai.APITimeoutError(request=request) from httpx.ReadTimeout("slow", request=request)
+    except openai.APITimeoutError as exc:
+        assert not _is_retryable(exc)
+    try:
+        raise openai.APITimeoutError(request=request) from httpx.ConnectTimeout("slow", request=request)
+    except openai.APITimeoutError as exc:
+        assert _is_retryable(exc)
+    assert not _is_retryable(ValueError("bad"))
+
+
+def test_chat_completion_retries_rate_limits(monkeypatch):
+    monkeypatch.setattr(openai_module.settings, "cache_enabled", False)
+    calls = []
+
+    class _Completions:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            if len(calls) < 3:
+                raise _rate_limit_error()
+            return "ok"
+
+    service = OpenAIService()
+    service.client = type("Client", (), {"chat": type("Chat", (), {"completions": _Completions()})()})()
+
+    assert asyncio.run(service._make_openai_request(model="m")) == "ok"
+    assert len(calls) == 3
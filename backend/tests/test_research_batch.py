@@ -0,0 +1,66 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import orjson
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.models import ResearchMode
+from app.services.openai_service import OpenAIService
+
+
+class _FakeClient:
+    def __init__(self, output: bytes = b""):
+        self.uploaded = None
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+        self._output = output
+
+    def with_options(self, **kwargs):
+        return self
+
+    async def _create_file(self, file, purpose):
+        self.uploaded = file[1]
+        return SimpleNamespace(id="file-in")
+
+    async def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1", status="in_progress")
+
+    async def _retrieve(self, batch_id):
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id="file-out")
+
+    async def _content(self, file_id):
+        return SimpleNamespace(content=self._output)
+
+
+def test_submit_writes_one_responses_request_per_prompt():
+    service = OpenAIService()
+    service.client = _FakeClient()
+
+    batch = asyncio.run(service.submit_deep_research_batch(["a", "b"], ResearchMode.DEEP_RESEARCH_O3, 10))
+
+    assert (batch.batch_id, batch.status) == ("batch-1", "in_progress")
+    lines = [orjson.loads(line) for line in service.client.uploaded.splitlines()]
+    assert [line["custom_id"] for line in lines] == ["prompt-0", "prompt-1"]
+    assert all(line["url"] == "/v1/responses" and line["body"]["max_tool_calls"] == 10 for line in lines)
+
+
+def test_completed_batch_returns_outputs_in_prompt_order():
+    message = {"type": "message", "content": [{"type": "output_text", "text": "relatório"}]}
+    output = b"\n".join([
+        orjson.dumps({"custom_id": "prompt-1", "response": {"status_code": 500, "body": {"error": {"message": "boom"}}}}),
+        orjson.dumps({"custom_id": "prompt-0", "response": {"status_code": 200, "body": {"output": [message]}}}),
+    ])
+    service = OpenAIService()
+    service.client = _FakeClient(output)
+
+    batch = asyncio.run(service.get_deep_research_batch("batch-1"))
+
+    assert batch.status == "completed"
+    assert [(item.custom_id, item.output, item.error_message) for item in batch.results] == [
+        ("prompt-0", "relatório", None),
+        ("prompt-1", None, "boom"),
+    ]
@@ -0,0 +1,203 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import httpx
+import pytest
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.models import ResearchMode, ResearchRequest, SearchResult
+from app.services import research_service as research_module
+from app.services.cache import TTLCache
+from app.services import openai_service as openai_module
+from app.services.openai_service import _FALLBACK_CLARIFY, Analysis
+from app.services.research_service import ResearchService
+
+
+@pytest.fixture(autouse=True)
+def _fresh_research_cache(monkeypatch):
+    monkeypatch.setattr(research_module, "_research_cache", TTLCache(max_entries=10, ttl=60))
+    monkeypatch.setattr(openai_module, "_result_cache", TTLCache(max_entries=10, ttl=60))
+    monkeypatch.setattr(openai_module, "_response_cache", TTLCache(max_entries=10, ttl=60))
+
+
+def _run(mode: ResearchMode, customise: Optional[Callable[[ResearchService], None]] = None, **request_fields):
+    service = ResearchService()
+
+    async def deep_research(prompt, mode, tools, **kwargs):
+        return Analysis("análise", cacheable=True)
+
+    service.openai_service.deep_research = deep_research
+    if customise is not None:
+        customise(service)
+    request = ResearchRequest(**{
+        "query": "IA no Brasil", "mode": mode, "include_clarification": False, "include_prompt_rewriting": False,
+        **request_fields
+    })
+
+    async def scenario():
+        try:
+            return await service.conduct_research(request)
+        finally:
+            await service.shutdown()
+
+    return asyncio.run(scenario())
+
+
+def test_combined_research_records_both_searches():
+    result = _run(ResearchMode.WEBSEARCH_MCP)
+
+    assert result.success
+    assert result.final_analysis == "análise"
+    sources = [step.input_data["source"] for step in result.steps if step.step_type == "search"]
+    assert sources == ["websearch", "mcp"]
+    assert any(r.url.startswith("mcp://") for r in result.search_results)
+
+
+def test_mcp_only_research_fetches_every_result():
+    result = _run(ResearchMode.MCP_ONLY)
+
+    assert result.success
+    assert [f.id for f in result.fetch_results] == [r.id for r in result.search_results]
+    assert len([step for step in result.steps if step.step_type == "fetch"]) == len(result.search_results)
+
+
+def test_deep_research_lists_its_tools():
+    result = _run(ResearchMode.DEEP_RESEARCH_O3)
+
+    assert result.success
+    assert result.steps[-1].input_data["tools"] == ["web_search", "mcp_search", "mcp_fetch"]
+
+
+def test_combined_research_fetches_the_mcp_hits():
+    result = _run(ResearchMode.WEBSEARCH_MCP)
+
+    mcp_ids = [r.id for r in result.search_results if r.url.startswith("mcp://")]
+    assert [f.id for f in result.fetch_results] == mcp_ids
+    assert [step.step_type for step in result.steps] == ["search", "search"] + ["fetch"] * len(mcp_ids) + ["analysis"]
+
+
+def test_mcp_only_research_never_builds_the_web_search_service():
+    services = []
+
+    assert _run(ResearchMode.MCP_ONLY, services.append).success
+    assert "websearch_service" not in vars(services[0])
+
+
+def test_combined_research_keeps_the_branch_that_finished():
+    async def failing_search(query, max_results=10):
+        await asyncio.sleep(0.1)
+        raise ValueError("busca indisponível")
+
+    def customise(service):
+        service.websearch_service.execute_web_search_tool = failing_search
+
+    result = _run(ResearchMode.WEBSEARCH_MCP, customise)
+    assert not result.success
+    assert result.error_message == "busca indisponível"
+    assert result.search_results and all(r.url.startswith("mcp://") for r in result.search_results)
+    assert [step.input_data["source"] for step in result.steps if step.step_type == "search"] == ["mcp"]
+
+
+def test_identical_requests_reuse_the_cached_result():
+    first = _run(ResearchMode.WEBSEARCH_ONLY)
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("downstream call on a cache hit")
+
+    def customise(service):
+        service.websearch_service.execute_web_search_tool = unexpected
+
+    second = _run(ResearchMode.WEBSEARCH_ONLY, customise)
+    assert second.cached and not first.cached
+    assert second.model_copy(update={"cached": False}) == first
+
+
+def test_failed_analysis_is_not_cached():
+    calls = []
+
+    async def failing_deep_research(prompt, mode, tools, **kwargs):
+        calls.append(prompt)
+        raise httpx.ConnectError("down")
+
+    def customise(service):
+        service.openai_service.deep_research = failing_deep_research
+
+    first = _run(ResearchMode.WEBSEARCH_ONLY, customise)
+    second = _run(ResearchMode.WEBSEARCH_ONLY, customise)
+
+    assert not first.success and not second.success
+    assert len(calls) == 2
+
+
+def test_truncated_analysis_is_not_cached():
+    calls = []
+
+    async def make_openai_request(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content="análise cortad")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="length")])
+
+    def customise(service):
+        del service.openai_service.deep_research
+        service.openai_service._make_openai_request = make_openai_request
+
+    first = _run(ResearchMode.WEBSEARCH_ONLY, customise)
+    second = _run(ResearchMode.WEBSEARCH_ONLY, customise)
+
+    assert first.final_analysis == "análise cortad"
+    assert not second.cached
+    assert len(calls) == 2
+
+
+def test_deep_research_without_output_is_not_cached():
+    calls = []
+
+    async def post_responses(payload):
+        calls.append(payload)
+        return SimpleNamespace(status_code=200, content=b'{"status": "queued", "output": []}')
+
+    def customise(service):
+        del service.openai_service.deep_research
+        service.openai_service._post_responses = post_responses
+
+    first = _run(ResearchMode.DEEP_RESEARCH_O3, customise)
+    second = _run(ResearchMode.DEEP_RESEARCH_O3, customise)
+
+    assert first.final_analysis == "No response generated"
+    assert not second.cached
+    assert len(calls) == 2
+
+
+def test_fallback_clarification_is_not_cached():
+    calls = []
+
+    async def clarify_intent(query):
+        calls.append(query)
+        return _FALLBACK_CLARIFY.model_copy(deep=True)
+
+    def customise(service):
+        service.openai_service.clarify_intent = clarify_intent
+
+    first = _run(ResearchMode.MCP_ONLY, customise, include_clarification=True)
+    second = _run(ResearchMode.MCP_ONLY, customise, include_clarification=True)
+
+    assert first.success and not second.cached
+    assert len(calls) == 2
+
+
+def test_combined_analysis_skips_duplicates_and_empty_snippets():
+    results = [
+        SearchResult(id="a", title="A", url="https://x", snippet="s" * 50, relevance_score=0.2),
+        SearchResult(id="b", title="B", url="https://x", snippet="s" * 50, relevance_score=0.9),
+        SearchResult(id="c", title="C", url="mcp://c", snippet="curto", relevance_score=0.8),
+        SearchResult(id="d", title="D", url="mcp://d", snippet="s" * 50, relevance_score=0.5),
+    ]
+
+    deduped = ResearchService._dedupe_search_results(results)
+    assert [r.id for r in deduped] == ["a", "c", "d"]
+    assert [r.id for r in ResearchService._select_for_analysis(deduped)] == ["d", "a"]
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import httpx
+import orjson
+from fastapi.testclient import TestClient
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.main import app
+from app.services import http as http_module
+
+client = TestClient(app)
+
+
+def _sse(event: dict) -> bytes:
+    return b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+
+
+def test_stream_forwards_output_text_deltas(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert orjson.loads(request.content)["stream"] is True
+        body = b"".join([
+            _sse({"type": "response.created"}),
+            _sse({"type": "response.output_text.delta", "delta": "Olá"}),
+            _sse({"type": "response.output_text.delta", "delta": " mundo"}),
+            _sse({"type": "response.completed"}),
+        ])
+        return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+    monkeypatch.setattr(http_module, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    response = client.post("/research/stream", json={"rewritten_prompt": "p", "mode": "o3-deep-research"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == 'data: {"delta":"Olá"}\n\ndata: {"delta":" mundo"}\n\nevent: done\ndata: {}\n\n'
+
+
+def test_stream_rejects_non_deep_modes():
+    response = client.post("/research/stream", json={"rewritten_prompt": "p", "mode": "websearch-only"})
+    assert response.status_code == 400
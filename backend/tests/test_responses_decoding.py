@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.services import http as http_module
+from app.services import openai_service as openai_module
+from app.services.openai_service import DeepResearchTimeout, OpenAIService
+
+
+def test_deep_research_reads_output_text_from_responses_body(monkeypatch):
+    body = {
+        "id": "resp_1",
+        "status": "completed",
+        "usage": {"input_tokens": 10, "output_tokens": 20},
+        "output": [
+            {"type": "reasoning", "summary": [{"type": "summary_text", "text": "pensando"}]},
+            {"type": "web_search_call", "status": "completed"},
+            {"type": "message", "content": [
+                {"type": "output_text", "text": "Parte 1. ", "annotations": []},
+                {"type": "output_text", "text": "Parte 2."}
+            ]}
+        ]
+    }
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=orjson.dumps(body)))
+    monkeypatch.setattr(http_module, "_client", httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(openai_module.settings, "cache_enabled", False)
+
+    result = asyncio.run(OpenAIService()._make_deep_research_request("o3-deep-research", "p", []))
+    assert result == ("Parte 1. Parte 2.", True)
+
+
+def test_deep_research_timeout_has_a_readable_message(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("", request=request)
+
+    monkeypatch.setattr(http_module, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(openai_module.settings, "cache_enabled", False)
+
+    with pytest.raises(DeepResearchTimeout, match="levando mais tempo que o esperado"):
+        asyncio.run(OpenAIService()._make_deep_research_request("o3-deep-research", "p", []))
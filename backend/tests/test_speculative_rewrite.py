@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.models import ClarificationAnswer, ClarificationResponse, ClarificationWithAnswers, PromptRewriteResponse
+from app.services.openai_service import OpenAIService
+
+_CLARIFICATION = ClarificationResponse(
+    questions=[{"question": "Q?", "context": "C"}],
+    clarified_intent="intent"
+)
+
+
+def _service(calls):
+    service = OpenAIService()
+
+    async def rewrite_prompt(original_query, clarification_with_answers):
+        calls.append(clarification_with_answers.answers)
+        await asyncio.sleep(0)
+        return PromptRewriteResponse(original_query=original_query, rewritten_prompt="p", reasoning="r")
+
+    service.rewrite_prompt = rewrite_prompt
+    return service
+
+
+def test_skipped_questions_reuse_the_prefetched_rewrite():
+    async def scenario():
+        calls = []
+        service = _service(calls)
+        service.start_speculative_rewrite("query", _CLARIFICATION)
+        request = ClarificationWithAnswers(questions=_CLARIFICATION.questions, answers=[], clarified_intent="intent")
+
+        task = service.take_speculative_rewrite("query", request)
+        assert (await task).rewritten_prompt == "p"
+        assert calls == [[]]
+        assert service.take_speculative_rewrite("query", request) is None
+
+    asyncio.run(scenario())
+
+
+def test_answered_questions_cancel_the_prefetched_rewrite():
+    async def scenario():
+        service = _service([])
+        service.start_speculative_rewrite("query", _CLARIFICATION)
+        pending = next(iter(service._speculative_rewrites.values()))
+        request = ClarificationWithAnswers(
+            questions=_CLARIFICATION.questions,
+            answers=[ClarificationAnswer(question_index=0, answer="A")],
+            clarified_intent="intent"
+        )
+
+        assert service.take_speculative_rewrite("query", request) is None
+        await asyncio.sleep(0)
+        assert pending.cancelled()
+
+    asyncio.run(scenario())
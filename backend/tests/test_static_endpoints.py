@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_static_endpoints_return_etag():
+    for path in ["/", "/research-modes", "/research-depth-options", "/tools"]:
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert response.headers["cache-control"] == "public, max-age=300"
+
+
+def test_matching_if_none_match_returns_304():
+    etag = client.get("/research-modes").headers["etag"]
+
+    response = client.get("/research-modes", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/research-modes", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert "modes" in response.json()
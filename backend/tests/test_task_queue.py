@@ -0,0 +1,69 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure the backend 'app' package is importable
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.models import ResearchMode, ResearchRequest, ResearchResult, ResearchTaskStatus
+from app.services.task_queue import ResearchTaskQueue
+
+
+class FakeResearchService:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def conduct_research(self, request: ResearchRequest) -> ResearchResult:
+        await self.release.wait()
+        return ResearchResult(
+            query=request.query,
+            mode=request.mode,
+            final_analysis=f"analysis of {request.query}",
+            total_duration_ms=1,
+            success=True
+        )
+
+
+def make_request(query: str) -> ResearchRequest:
+    return ResearchRequest(query=query, mode=ResearchMode.MCP_ONLY)
+
+
+def test_submitted_task_completes_in_background():
+    async def scenario():
+        service = FakeResearchService()
+        queue = ResearchTaskQueue(service, workers=1, maxsize=10, retention=10)
+        await queue.start()
+
+        task = queue.submit(make_request("ia"))
+        assert task.status == ResearchTaskStatus.QUEUED
+
+        await asyncio.sleep(0)
+        assert queue.get(task.task_id).status == ResearchTaskStatus.RUNNING
+
+        service.release.set()
+        await queue._queue.join()
+        finished = queue.get(task.task_id)
+        await queue.stop()
+        return finished
+
+    finished = asyncio.run(scenario())
+    assert finished.status == ResearchTaskStatus.COMPLETED
+    assert finished.result.final_analysis == "analysis of ia"
+
+
+def test_submit_rejects_when_queue_is_full():
+    async def scenario():
+        queue = ResearchTaskQueue(FakeResearchService(), workers=1, maxsize=1, retention=10)
+        await queue.start()
+        queue.submit(make_request("first"))
+        await asyncio.sleep(0)
+        queue.submit(make_request("second"))
+        with pytest.raises(asyncio.QueueFull):
+            queue.submit(make_request("third"))
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert all(task.status == ResearchTaskStatus.FAILED for task in queue.tasks.values())
@@ -76,6 +76,7 @@ export interface ResearchResult {
   total_duration_ms: number
   success: boolean
   error_message?: string
+  cached?: boolean
 }
 
 export interface ResearchModeInfo {